@@ -0,0 +1,376 @@
+"""
+Short Exercises #1: bulk versions of the exercise functions
+
+These functions compute the same values as the functions in se1.py,
+but work on many inputs at once.
+"""
+
+import array
+import bisect
+import math
+
+import numpy as np
+
+
+# Indexed by the sign of a number plus one
+NUMBER_STRINGS = np.array(["NEGATIVE", "ZERO", "POSITIVE"])
+
+
+def to_array(values):
+    """
+    Convert a NumPy array, a list, any other iterable, or a single
+    number to an array.
+
+    Input:
+        values: number, array, list, tuple, or iterable of numbers
+
+    Returns: NumPy array
+    """
+
+    if isinstance(values, np.ndarray):
+        return values
+    if not hasattr(values, "__len__") and hasattr(values, "__iter__"):
+        values = list(values)
+    return np.asarray(values)
+
+
+def add_one_and_multiply_batch(a, x):
+    """
+    Add 1 to each a, and multiply by the corresponding x
+
+    Inputs:
+        a: number, array, or iterable of numbers
+        x: number, array, or iterable of numbers (broadcast against a)
+
+    Returns: array of numbers
+    """
+
+    return (to_array(a) + 1) * to_array(x)
+
+
+def out_of_range_batch(x, lb, ub):
+    """
+    Is each x outside the range lb to ub (inclusive)?
+
+    Inputs:
+        x: number, array, or iterable of numbers
+        lb: lower bound (number or array broadcast against x)
+        ub: upper bound (number or array broadcast against x)
+
+    Returns: boolean array
+    """
+
+    x = to_array(x)
+    return (x < to_array(lb)) | (x > to_array(ub))
+
+
+def number_string_codes(x):
+    """
+    Given numbers x, classify each one as negative, zero, or positive,
+    without building any strings. NaN is classified as zero, as in a
+    chain of comparisons with 0.
+
+    Input:
+        x: number, array, or iterable of numbers
+
+    Returns: a tuple of an array of codes (np.int8) and the categories
+        they index into (NUMBER_STRINGS): 0 for "NEGATIVE", 1 for
+        "ZERO", and 2 for "POSITIVE"
+    """
+
+    x = to_array(x)
+    codes = (x > 0).astype(np.int8)
+    codes += 1
+    codes -= x < 0
+    return codes, NUMBER_STRINGS
+
+
+def number_string_batch(x):
+    """
+    Given numbers x, produce an array with the strings "POSITIVE",
+    "NEGATIVE", or "ZERO" (depending on the sign of each number).
+    NaN produces "ZERO". Use number_string_codes to avoid building the
+    strings.
+
+    Input:
+        x: number, array, or iterable of numbers
+
+    Returns: array of strings
+    """
+
+    codes, categories = number_string_codes(x)
+    return categories.take(codes)
+
+
+def count_multiples(lb, ub, m):
+    """
+    Count the multiples of m between lb and ub (inclusive)
+
+    Inputs:
+        lb (int): lower bound
+        ub (int): upper bound
+        m (int): a non-zero integer
+
+    Returns: int
+    """
+
+    m = abs(m)
+    return ub // m - (lb - 1) // m
+
+
+def num_divisible_fast(lb, ub, p, q):
+    """
+    How many numbers between lb and ub (inclusive) are divisible by p
+    or divisible by q, but not divisible by both p and q.
+
+    Computes the answer in constant time using inclusion-exclusion
+    on the multiples of p, q, and their least common multiple.
+
+    Inputs:
+        lb (int): lower bound
+        ub (int): upper bound
+        p (int): a non-zero integer
+        q (int): a non-zero integer
+
+    Returns: int
+    """
+
+    if lb > ub:
+        return 0
+
+    both = math.lcm(p, q)
+    return (count_multiples(lb, ub, p) + count_multiples(lb, ub, q)
+            - 2 * count_multiples(lb, ub, both))
+
+
+def num_divisible_bulk(lb, ub, p, q):
+    """
+    Vectorized version of num_divisible_fast: each argument is an
+    array (or a number that is broadcast against the others).
+
+    Inputs:
+        lb: lower bounds
+        ub: upper bounds
+        p: non-zero integers
+        q: non-zero integers
+
+    Returns: array of ints
+    """
+
+    lb = to_array(lb).astype(np.int64)
+    ub = to_array(ub).astype(np.int64)
+    p = to_array(p).astype(np.int64)
+    q = to_array(q).astype(np.int64)
+    # lb - 1 and the absolute values below must fit in 64 bits
+    smallest = np.iinfo(np.int64).min
+    if any((x == smallest).any() for x in (lb, ub, p, q)):
+        raise OverflowError("arguments must be greater than {}".format(smallest))
+    p = np.abs(p)
+    q = np.abs(q)
+    if (p == 0).any() or (q == 0).any():
+        raise ZeroDivisionError("p and q must be non-zero")
+
+    def count(m):
+        return ub // m - (lb - 1) // m
+
+    # np.lcm overflows silently, so compute lcm(p, q) = l * q only where
+    # it is at most max(|lb|, |ub|). Where it is larger, the only
+    # multiple of it in [lb, ub] is 0 (if 0 is in the range).
+    l = p // np.gcd(p, q)
+    too_big = l > np.maximum(np.abs(lb), np.abs(ub)) // q
+    both = np.where(too_big, (lb <= 0) & (ub >= 0), count(np.where(too_big, 1, l) * q))
+
+    n = count(p) + count(q) - 2 * both
+    return np.where(lb > ub, 0, n)
+
+
+class CountIndex(object):
+    """
+    A sorted copy of a list of numbers that answers "how many values
+    are strictly greater than val?" in O(log n) time.
+    """
+
+    def __init__(self, lst):
+        """
+        Constructor.
+
+        Parameters
+        - lst: list (or iterable) of numbers. It is copied, not modified.
+        """
+
+        self._values = sorted(lst)
+
+    def __len__(self):
+        return len(self._values)
+
+    def count_greater_than_val(self, val):
+        """
+        Count the number of values strictly greater than val.
+        """
+
+        return len(self._values) - bisect.bisect_right(self._values, val)
+
+    def count_greater_than_vals(self, vals):
+        """
+        Count the number of values strictly greater than each
+        threshold in vals.
+
+        Returns: list of ints, one per threshold
+        """
+
+        n = len(self._values)
+        return [n - bisect.bisect_right(self._values, val) for val in vals]
+
+    def insert(self, val):
+        """
+        Add a value to the index.
+        """
+
+        bisect.insort(self._values, val)
+
+    def remove(self, val):
+        """
+        Remove one occurrence of a value from the index. Raises
+        ValueError if the value is not in the index.
+        """
+
+        i = bisect.bisect_left(self._values, val)
+        if i == len(self._values) or self._values[i] != val:
+            raise ValueError("{} is not in the index".format(val))
+        del self._values[i]
+
+
+def count_greater_than_val_stream(values, val):
+    """
+    Count the number of values strictly greater than val, consuming
+    values one at a time.
+
+    Inputs:
+        values: any iterable of numbers (e.g., a generator)
+        val: the threshold
+
+    Returns: int
+    """
+
+    return sum(1 for x in values if x > val)
+
+
+def count_greater_than_val_file(filename, val, binary=False,
+                                dtype=np.float64, chunk_size=2**20):
+    """
+    Count the number of values in a file that are strictly greater than
+    val. The file is read in chunks, so memory use does not depend on
+    the size of the file.
+
+    Inputs:
+        filename (string): the name of the file
+        val: the threshold
+        binary (boolean): if True, the file holds raw values of type
+            dtype; otherwise, it holds whitespace-separated numbers
+        dtype: NumPy type of the values (e.g., np.float64 or np.int64)
+        chunk_size (int): number of values (binary) or bytes (text)
+            to read at a time
+
+    Returns: int
+    """
+
+    dtype = np.dtype(dtype)
+    n = 0
+    if binary:
+        with open(filename, "rb") as f:
+            while True:
+                data = f.read(chunk_size * dtype.itemsize)
+                if not data:
+                    break
+                if len(data) % dtype.itemsize != 0:
+                    msg = "{} does not hold a whole number of {} values"
+                    raise ValueError(msg.format(filename, dtype))
+                n += int(np.count_nonzero(np.frombuffer(data, dtype) > val))
+        return n
+
+    with open(filename, "rb") as f:
+        leftover = b""
+        while True:
+            data = f.read(chunk_size)
+            tokens = (leftover + data).split()
+            # The last token may continue into the next chunk
+            if data and tokens and not data[-1:].isspace():
+                leftover = tokens.pop()
+            else:
+                leftover = b""
+            if tokens:
+                chunk = np.array(tokens).astype(dtype)
+                n += int(np.count_nonzero(chunk > val))
+            if not data:
+                break
+    return n
+
+
+def negate_list_fast(lst):
+    """
+    Produce a *new* sequence with its values negated. The result has
+    the same type as lst: arrays, array.array objects, and memoryviews
+    are negated in bulk without boxing each value; anything else
+    produces a list.
+
+    Input:
+        lst: list, NumPy array, array.array, memoryview, or iterable
+            of numbers. It is not modified. Arrays, array.array objects,
+            and memoryviews of unsigned integers raise TypeError.
+
+    Returns: the negated values, in a new object of the same type
+    """
+
+    if isinstance(lst, array.array):
+        if lst.typecode not in "bhilqfd":
+            msg = "cannot negate array.array of type '{}'"
+            raise TypeError(msg.format(lst.typecode))
+        # Negate straight into the new array's buffer
+        new_lst = array.array(lst.typecode, [0]) * len(lst)
+        np.negative(np.frombuffer(lst, lst.typecode),
+                    out=np.frombuffer(new_lst, lst.typecode))
+        return new_lst
+
+    if isinstance(lst, (np.ndarray, memoryview)):
+        values = np.asarray(lst)
+        # Negating unsigned values would silently wrap around
+        if values.dtype.kind not in "ifc":
+            msg = "cannot negate values of type '{}'"
+            raise TypeError(msg.format(values.dtype))
+        if isinstance(lst, np.ndarray):
+            return np.negative(lst)
+        return memoryview(np.negative(values))
+
+    return [-x for x in lst]
+
+
+class NegatedView(object):
+    """
+    A read-only view of a sequence of numbers that negates each value
+    when it is accessed. No copy of the sequence is made, so changes
+    to the underlying sequence are visible through the view.
+    """
+
+    def __init__(self, lst):
+        """
+        Constructor.
+
+        Parameters
+        - lst: the sequence (list, array, etc.) to view
+        """
+
+        self._lst = lst
+
+    def __len__(self):
+        return len(self._lst)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return NegatedView(self._lst[i])
+        return -self._lst[i]
+
+    def __iter__(self):
+        return (-x for x in self._lst)
+
+    def __repr__(self):
+        return "NegatedView({!r})".format(self._lst)
@@ -0,0 +1,291 @@
+import array
+import sys
+import os
+import pytest
+import numpy as np
+
+# Handle the fact that the test code may not
+# be in the same directory as the solution code
+sys.path.insert(0, os.getcwd())
+
+import se1_bulk
+
+MODULE = "se1_bulk"
+
+def test_add_one_and_multiply_batch_1():
+    do_test_add_one_and_multiply_batch(a=[0, 5, 5, 9, 9, -11], x=[0, 2, 0, 1, -2, 2],
+                                       expected=[0, 12, 0, 10, -20, -20])
+
+
+def test_add_one_and_multiply_batch_2():
+    do_test_add_one_and_multiply_batch(a=(v for v in [1, 2, 3]), x=3,
+                                       expected=[6, 9, 12])
+
+
+def test_out_of_range_batch_1():
+    do_test_out_of_range_batch(x=[5, 15, 3, 10, 2], lb=3, ub=10,
+                               expected=[False, True, False, False, True])
+
+
+def test_number_string_batch_1():
+    do_test_number_string_batch(x=[10, -7, 0],
+                                expected=["POSITIVE", "NEGATIVE", "ZERO"])
+
+
+def test_number_string_batch_2():
+    do_test_number_string_batch(x=[], expected=[])
+
+
+def test_number_string_batch_3():
+    do_test_number_string_batch(x=[1.5, float("nan"), -0.0, -np.inf],
+                                expected=["POSITIVE", "ZERO", "ZERO", "NEGATIVE"])
+
+
+def test_number_string_codes_1():
+    codes, categories = se1_bulk.number_string_codes(np.array([10, -7, 0, 3]))
+    check_equals(codes.dtype, np.int8)
+    check_equals(codes.tolist(), [2, 0, 1, 2])
+    check_equals(categories[codes].tolist(), ["POSITIVE", "NEGATIVE", "ZERO", "POSITIVE"])
+
+
+def test_num_divisible_fast_1():
+    for lb, ub, p, q in [(1, 20, 2, 3), (2, 3, 2, 3), (12, 20, 2, 2), (1, 25, 3, 5),
+                         (-30, -1, 4, 6), (-17, 23, 3, 7), (5, 5, 5, 3), (10, 1, 2, 3)]:
+        do_test_num_divisible_fast(lb, ub, p, q, expected=num_divisible_scan(lb, ub, p, q))
+
+
+def test_num_divisible_fast_2():
+    do_test_num_divisible_fast(lb=1, ub=10**12, p=2, q=3, expected=500000000001)
+
+
+def test_num_divisible_bulk_1():
+    cases = [(1, 20, 2, 3), (2, 3, 2, 3), (12, 20, 2, 2), (-30, -1, 4, 6),
+             (-17, 23, 3, 7), (10, 1, 2, 3), (-5, 5, 7, 11), (-10, 10, 4, 6)]
+    lb, ub, p, q = [list(col) for col in zip(*cases)]
+    expected = [num_divisible_scan(*case) for case in cases]
+
+    # The least common multiple does not fit in 64 bits
+    p_big, q_big = 4 * 10**9, 4 * 10**9 + 1
+    for case in [(1, 10**12, p_big, q_big), (-10**12, 10**12, p_big, q_big)]:
+        cases.append(case)
+        for values, x in zip((lb, ub, p, q), case):
+            values.append(x)
+        expected.append(se1_bulk.num_divisible_fast(*case))
+    check_equals(expected[-2], 499)
+
+    recreate_msg = gen_recreate_msg(MODULE, "num_divisible_bulk", *(lb, ub, p, q))
+    actual = se1_bulk.num_divisible_bulk(lb, ub, p, q)
+
+    check_none(actual, recreate_msg)
+    check_equals(actual.tolist(), expected, recreate_msg)
+
+    with pytest.raises(OverflowError):
+        se1_bulk.num_divisible_bulk(-2**63, 5, 3, 5)
+
+
+def test_count_greater_than_val_index_1():
+    index = se1_bulk.CountIndex([1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+    for val, expected in [(5, 5), (0, 10), (10, 0), (5.5, 5), (-4, 10)]:
+        check_equals(index.count_greater_than_val(val), expected)
+
+
+def test_count_greater_than_val_index_2():
+    index = se1_bulk.CountIndex([3, 1, 3, 2, 3])
+    check_equals(index.count_greater_than_vals([0, 1, 2, 3]), [5, 4, 3, 0])
+
+
+def test_count_greater_than_val_index_3():
+    lst = [4, 8, 15, 16, 23, 42]
+    index = se1_bulk.CountIndex(lst)
+    index.insert(20)
+    index.insert(16)
+    index.remove(4)
+    check_equals(index.count_greater_than_vals([4, 15, 16, 20]), [7, 5, 3, 2])
+    check_equals(len(index), 7)
+    check_list_unmodified("lst", before=[4, 8, 15, 16, 23, 42], after=lst)
+
+    with pytest.raises(ValueError):
+        index.remove(5)
+
+
+def test_count_greater_than_val_stream_1():
+    values = (x for x in [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+    check_equals(se1_bulk.count_greater_than_val_stream(values, 5), 5)
+
+
+def test_count_greater_than_val_file_1(tmp_path):
+    filename = tmp_path / "values.txt"
+    filename.write_text("1 2.5 -3\n40 5\n\n6 700 8\n9 10")
+    for chunk_size in [1, 3, 2**20]:
+        actual = se1_bulk.count_greater_than_val_file(filename, 5, chunk_size=chunk_size)
+        check_equals(actual, 6)
+
+
+def test_count_greater_than_val_file_2(tmp_path):
+    filename = tmp_path / "values.bin"
+    for dtype in ["float64", "int64"]:
+        values = np.arange(-50, 50).astype(dtype)
+        values.tofile(filename)
+        for chunk_size in [1, 7, 2**20]:
+            actual = se1_bulk.count_greater_than_val_file(
+                filename, 10, binary=True, dtype=dtype, chunk_size=chunk_size)
+            check_equals(actual, 39)
+
+
+def test_negate_list_fast_1():
+    do_test_negate_list_fast(lst=[1, -2, 3.5, 0], expected=[-1, 2, -3.5, 0])
+
+
+def test_negate_list_fast_2():
+    do_test_negate_list_fast(lst=np.array([1, -2, 3]), expected=np.array([-1, 2, -3]))
+
+
+def test_negate_list_fast_3():
+    do_test_negate_list_fast(lst=array.array("d", [1.5, -2, 0]),
+                             expected=array.array("d", [-1.5, 2, 0]))
+    do_test_negate_list_fast(lst=array.array("q", [7, -8]),
+                             expected=array.array("q", [-7, 8]))
+
+
+def test_negate_list_fast_4():
+    lst = array.array("i", [1, 2, -3])
+    lst_copy = lst.tolist()
+
+    actual = se1_bulk.negate_list_fast(memoryview(lst))
+
+    check_type(actual, memoryview(lst))
+    check_equals(actual.tolist(), [-1, -2, 3])
+    check_list_unmodified("lst", before=lst_copy, after=lst.tolist())
+
+
+def test_negate_list_fast_5():
+    for lst in [array.array("B", [1, 2]), memoryview(b"\x01\x02"),
+                memoryview(array.array("H", [1, 2])), np.array([1, 2], dtype=np.uint32)]:
+        with pytest.raises(TypeError):
+            se1_bulk.negate_list_fast(lst)
+
+
+def test_negate_list_view_1():
+    lst = [1, -2, 3, 4]
+    view = se1_bulk.NegatedView(lst)
+
+    check_equals(len(view), 4)
+    check_equals(list(view), [-1, 2, -3, -4])
+    check_equals(view[1], 2)
+    check_equals(list(view[1:3]), [2, -3])
+    check_list_unmodified("lst", before=[1, -2, 3, 4], after=lst)
+
+
+# # #
+#
+# HELPER FUNCTIONS
+#
+# # #
+
+def gen_recreate_msg(module, function, *params):
+    params_str = ", ".join([str(p) for p in params])
+
+    recreate_msg = "To recreate this test in ipython3 run:\n"
+    recreate_msg += "  {}.{}({})".format(module, function, params_str)
+
+    return recreate_msg
+
+
+def num_divisible_scan(lb, ub, p, q):
+    return len([x for x in range(lb, ub + 1) if (x % p == 0) != (x % q == 0)])
+
+
+def check_none(actual, recreate_msg=None):
+    msg = "The function returned None."
+    msg += " Did you forget to replace the placeholder value we provide?"
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert actual is not None, msg
+
+
+def check_type(actual, expected, recreate_msg=None):
+    actual_type = type(actual)
+    expected_type = type(expected)
+
+    msg = "The function returned a value of the wrong type.\n"
+    msg += "  Expected return type: {}.\n".format(expected_type.__name__)
+    msg += "  Actual return type: {}.".format(actual_type.__name__)
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert isinstance(actual, expected_type), msg
+
+
+def check_equals(actual, expected, recreate_msg=None):
+    msg = "Actual ({}) and expected ({}) values do not match.".format(actual, expected)
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert actual == expected, msg
+
+
+def check_list_unmodified(param_name, before, after, recreate_msg=None):
+    msg = "You modified the contents of {} (this is not allowed).\n".format(param_name)
+    msg += "  Value before your code: {}\n".format(before)
+    msg += "  Value after your code:  {}".format(after)
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert before == after, msg
+
+
+# # #
+#
+# TEST HELPERS
+#
+# # #
+
+
+def do_test_add_one_and_multiply_batch(a, x, expected):
+    recreate_msg = gen_recreate_msg(MODULE, "add_one_and_multiply_batch", *(a, x))
+
+    actual = se1_bulk.add_one_and_multiply_batch(a, x)
+
+    check_none(actual, recreate_msg)
+    check_equals(actual.tolist(), expected, recreate_msg)
+
+
+def do_test_out_of_range_batch(x, lb, ub, expected):
+    recreate_msg = gen_recreate_msg(MODULE, "out_of_range_batch", *(x, lb, ub))
+
+    actual = se1_bulk.out_of_range_batch(x, lb, ub)
+
+    check_none(actual, recreate_msg)
+    check_equals(actual.tolist(), expected, recreate_msg)
+
+
+def do_test_number_string_batch(x, expected):
+    recreate_msg = gen_recreate_msg(MODULE, "number_string_batch", *(x,))
+
+    actual = se1_bulk.number_string_batch(x)
+
+    check_none(actual, recreate_msg)
+    check_equals(actual.tolist(), expected, recreate_msg)
+
+
+def do_test_num_divisible_fast(lb, ub, p, q, expected):
+    recreate_msg = gen_recreate_msg(MODULE, "num_divisible_fast", *(lb, ub, p, q))
+
+    actual = se1_bulk.num_divisible_fast(lb, ub, p, q)
+
+    check_none(actual, recreate_msg)
+    check_type(actual, expected, recreate_msg)
+    check_equals(actual, expected, recreate_msg)
+
+
+def do_test_negate_list_fast(lst, expected):
+    recreate_msg = gen_recreate_msg(MODULE, "negate_list_fast", *(lst,))
+    lst_copy = list(lst)
+
+    actual = se1_bulk.negate_list_fast(lst)
+
+    check_none(actual, recreate_msg)
+    check_type(actual, expected, recreate_msg)
+    check_equals(list(actual), list(expected), recreate_msg)
+    check_list_unmodified("lst", before=lst_copy, after=list(lst), recreate_msg=recreate_msg)
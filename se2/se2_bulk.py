@@ -0,0 +1,387 @@
+"""
+CS 121
+Short Exercises #2: bulk versions of the exercise functions
+
+These functions compute the same values as the functions in se2.py,
+but are designed for many calls or large inputs.
+"""
+
+import array
+import collections
+import functools
+
+import numpy as np
+
+
+def compute_peep(p, e):
+    """
+    Determine whether or not peep = pp^e by doing the arithmetic
+
+    Inputs:
+      p (int): first digit
+      e (int): second digit
+
+    Returns: True if peep = pp^e, False otherwise
+    """
+
+    return 1001 * p + 110 * e == (11 * p) ** e
+
+
+# PEEP_TABLE[p, e] is the answer to peep(p, e) for every pair of digits
+PEEP_TABLE = np.array([[compute_peep(p, e) for e in range(10)]
+                       for p in range(10)])
+
+
+def peep_fast(p, e):
+    """
+    Determine whether or not peep = pp^e using a precomputed table
+
+    Inputs:
+      p (int): first digit
+      e (int): second digit
+
+    Returns: True if peep = pp^e, False otherwise
+    """
+
+    if not (0 <= p <= 9 and 0 <= e <= 9):
+        raise ValueError("p and e must be digits: {}, {}".format(p, e))
+
+    return bool(PEEP_TABLE[p, e])
+
+
+def peep_batch(p, e):
+    """
+    Determine whether or not peep = pp^e for many pairs of digits
+
+    Inputs:
+      p: array (or list) of first digits
+      e: array (or list) of second digits, broadcast against p
+
+    Returns: boolean array
+    """
+
+    p = np.asarray(p)
+    e = np.asarray(e)
+    if ((p < 0) | (p > 9)).any() or ((e < 0) | (e > 9)).any():
+        raise ValueError("p and e must be digits")
+
+    return PEEP_TABLE[p, e]
+
+
+def count_targets(lst, targets):
+    """
+    Count how many times each target occurs in a list, in one pass
+
+    Inputs:
+      lst (list or array): the list
+      targets (list): the target values
+
+    Returns: list with the number of occurrences of each target
+    """
+
+    if isinstance(lst, np.ndarray) and np.issubdtype(lst.dtype, np.integer):
+        values, counts = np.unique(lst, return_counts=True)
+        targets = np.asarray(targets)
+        if len(values) == 0:
+            return [0] * len(targets)
+        i = np.minimum(np.searchsorted(values, targets), len(values) - 1)
+        return np.where(values[i] == targets, counts[i], 0).tolist()
+
+    counts = collections.Counter(lst)
+    return [counts[target] for target in targets]
+
+
+def has_more_many(lst1, lst2, targets):
+    """
+    Determine which list contains more of each target value, making
+    one pass over each list
+
+    Inputs:
+      lst1 (list or array): first list
+      lst2 (list or array): second list
+      targets (list): the target values
+
+    Returns: dictionary that maps each target to True if lst1 contains
+      more of target, False otherwise
+    """
+
+    targets = list(targets)
+    counts1 = count_targets(lst1, targets)
+    counts2 = count_targets(lst2, targets)
+    return {target: c1 > c2 for target, c1, c2 in zip(targets, counts1, counts2)}
+
+
+def has_more_early_exit(lst1, lst2, target):
+    """
+    Determine which list contains more of the target value, stopping
+    as soon as the elements that have not been examined can no longer
+    change the answer
+
+    Inputs:
+      lst1 (list): first list
+      lst2 (list): second list
+      target: the target value
+
+    Returns: True if lst1 contains more of target, False otherwise
+    """
+
+    count1 = count2 = 0
+    left1 = len(lst1)
+    left2 = len(lst2)
+    for i in range(max(left1, left2)):
+        if i < len(lst1):
+            left1 -= 1
+            if lst1[i] == target:
+                count1 += 1
+        if i < len(lst2):
+            left2 -= 1
+            if lst2[i] == target:
+                count2 += 1
+        if count1 > count2 + left2:
+            return True
+        if count1 + left1 <= count2:
+            return False
+
+    return count1 > count2
+
+
+def replace_many(lst, replacements):
+    """
+    Replace several elements of a list at once, in a single pass.
+    Replacements are not chained: an element that is put into the
+    list is not itself replaced.
+
+    Input:
+      lst (list, array, or array.array): the list
+      replacements (dict): maps each element to replace (replacee) to
+        the element to replace it with (replacer)
+
+    Returns: None, modifies lst in-place
+
+    Raises TypeError if lst is an array and a replacer cannot be
+    stored in it exactly (e.g., a float in an array of ints).
+    """
+
+    if not replacements:
+        return
+
+    if isinstance(lst, array.array):
+        replace_many(np.frombuffer(lst, lst.typecode), replacements)
+        return
+
+    if isinstance(lst, np.ndarray):
+        replacees = np.array(list(replacements.keys()))
+        replacers = np.array(list(replacements.values()))
+        # Storing the replacers must not change them (e.g., 2.7 in an
+        # array of ints, or 300 in an array of int8)
+        converted = replacers.astype(lst.dtype) \
+            if np.can_cast(replacers.dtype, lst.dtype, casting="same_kind") else None
+        if converted is None or not np.array_equal(
+                converted, replacers, equal_nan=converted.dtype.kind in "fc"):
+            msg = "cannot store replacers of type {} in an array of type {} without changing them"
+            raise TypeError(msg.format(replacers.dtype, lst.dtype))
+        replacers = converted
+        order = np.argsort(replacees)
+        replacees = replacees[order]
+        replacers = replacers[order]
+
+        i = np.minimum(np.searchsorted(replacees, lst), len(replacees) - 1)
+        found = replacees[i] == lst
+        lst[found] = replacers[i[found]]
+        return
+
+    for i, x in enumerate(lst):
+        if x in replacements:
+            lst[i] = replacements[x]
+
+
+# Number of star strings kept by star_string
+STAR_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=STAR_CACHE_SIZE)
+def star_string(n):
+    """
+    Create a string of n stars. Calls with one of the STAR_CACHE_SIZE
+    most recently used widths return the same string object.
+
+    Input:
+      n (nonnegative int): the number of stars
+
+    Returns: string of stars (*)
+    """
+
+    return "*" * n
+
+
+def make_star_strings_fast(lst):
+    """
+    Create a list of star strings, sharing one string per width
+
+    Input:
+      lst (list of nonnegative integers): the list
+
+    Returns: A list of strings of stars (*)
+    """
+
+    # The strings are shared through a dictionary that lives only as
+    # long as this call, since the result holds on to them anyway
+    strings = {}
+    result = []
+    for n in lst:
+        s = strings.get(n)
+        if s is None:
+            s = strings[n] = "*" * n
+        result.append(s)
+    return result
+
+
+def iter_star_strings(lst):
+    """
+    Generate star strings one at a time
+
+    Input:
+      lst (iterable of nonnegative integers): the widths
+
+    Returns: generator of strings of stars (*)
+    """
+
+    for n in lst:
+        yield star_string(n)
+
+
+def write_star_strings(lst, f):
+    """
+    Write one line of stars per width to a file-like object, without
+    building the list of strings
+
+    Input:
+      lst (iterable of nonnegative integers): the widths
+      f: a file-like object open for writing text
+
+    Returns: None
+    """
+
+    for n in lst:
+        f.write("*" * n)
+        f.write("\n")
+
+
+def check_row(row, i, num_columns):
+    """
+    Check that a row of a grid has the expected number of columns
+
+    row (list or iterable): the row
+    i (int): the index of the row (used in the error message)
+    num_columns (int or None): the expected number of columns, or None
+      for the first row
+
+    Returns: the row (as a list, if it was not a sequence) and its
+      number of columns
+
+    Raises ValueError if the row does not have num_columns columns.
+    """
+
+    if not hasattr(row, "__len__"):
+        row = list(row)
+    if num_columns is not None and len(row) != num_columns:
+        msg = "Row {} has {} columns, but row 0 has {} columns"
+        raise ValueError(msg.format(i, len(row), num_columns))
+    return row, len(row)
+
+
+def rows_and_columns_contain_fast(lst, target):
+    """
+    Determines whether every row and every column of a list
+      of lists contains a target value, in one pass over the rows.
+
+    The columns that contain the target are marked in a bytearray as
+      each row is scanned, along with a count of the marked columns,
+      and the scan stops at the first row that does not contain the
+      target. Once every column is marked, the remaining rows are only
+      checked for the target. Since only the current row is kept in
+      memory, lst can be any iterator of rows (e.g., a csv.reader).
+      Two-dimensional NumPy arrays are checked with vectorized
+      operations instead.
+
+    lst (list of lists, iterable of rows, or 2D array): the list of lists
+    target: the target value
+
+    Returns: True if every row and every column of lst contains
+      target, False otherwise
+
+    Raises ValueError if the rows do not all have the same length.
+    """
+
+    if isinstance(lst, np.ndarray):
+        matches = lst == target
+        return bool(matches.any(axis=1).all() and matches.any(axis=0).all())
+
+    covered = None
+    num_covered = 0
+    num_columns = None
+    for i, row in enumerate(lst):
+        row, num_columns = check_row(row, i, num_columns)
+        if target not in row:
+            return False
+        if covered is None:
+            covered = bytearray(num_columns)
+        if num_covered < num_columns:
+            for j, x in enumerate(row):
+                if x == target and not covered[j]:
+                    covered[j] = 1
+                    num_covered += 1
+
+    return num_columns is None or num_covered == num_columns
+
+
+def rows_and_columns_contain_many(lst, targets):
+    """
+    Determines, for each of several target values, whether every row
+      and every column of a list of lists contains it. All targets are
+      checked in the same pass over the rows.
+
+    lst (list of lists or iterable of rows): the list of lists
+    targets (list): the target values (must be hashable)
+
+    Returns: dictionary that maps each target to True if every row and
+      every column of lst contains it, False otherwise
+
+    Raises ValueError if the rows do not all have the same length.
+    """
+
+    result = {target: True for target in targets}
+    # Maps each target that is in every row so far to a bytearray that
+    # marks the columns it is in and a count of the marked columns
+    columns = {target: None for target in targets}
+    num_columns = None
+    for i, row in enumerate(lst):
+        if not columns:
+            break
+        row, num_columns = check_row(row, i, num_columns)
+        if i == 0:
+            for target in columns:
+                columns[target] = [bytearray(num_columns), 0]
+        seen = set()
+        for j, x in enumerate(row):
+            if x in columns:
+                seen.add(x)
+                coverage = columns[x]
+                if not coverage[0][j]:
+                    coverage[0][j] = 1
+                    coverage[1] += 1
+        # A target that is missing from this row is not in every row
+        for target in [t for t in columns if t not in seen]:
+            result[target] = False
+            del columns[target]
+
+    for target, coverage in columns.items():
+        result[target] = coverage is None or coverage[1] == num_columns
+
+    return result
+
+    full = (1 << num_columns) - 1
+    for target, covered in columns.items():
+        result[target] = covered == full
+
+    return result
@@ -0,0 +1,265 @@
+import array
+import csv
+import io
+import sys
+import os
+import pytest
+import numpy as np
+
+# Handle the fact that the test code may not
+# be in the same directory as the solution code
+sys.path.insert(0, os.getcwd())
+
+import se2_bulk
+
+MODULE = "se2_bulk"
+
+def test_peep_fast_1():
+    for p in range(10):
+        for e in range(10):
+            expected = 1001 * p + 110 * e == (11 * p) ** e
+            do_test_peep_fast(p=p, e=e, expected=expected)
+
+def test_peep_fast_2():
+    with pytest.raises(ValueError):
+        se2_bulk.peep_fast(10, 1)
+
+def test_peep_batch_1():
+    p = [1, 3, 0, 1, 1, 2]
+    e = [3, 1, 1, 0, 2, 3]
+    actual = se2_bulk.peep_batch(p, e)
+    check_equals(actual.tolist(), [True, False, False, False, False, False])
+
+has_more_cases = [([], [], 1, False), ([], [1], 1, False), ([1], [1], 1, False),
+                  ([1], [], 1, True), ([1, 2, 1], [1, 2, 2], 1, True),
+                  ([1, 2, 2], [2, 1, 1], 1, False), ([1, 2, 2, 1], [2, 1, 1], 1, False),
+                  ([1, 1, 2, 2], [2, 1, 1, 1, 1], 2, True)]
+
+def test_has_more_many_1():
+    lst1 = [1, 1, 2, 2, 3, 5]
+    lst2 = [2, 1, 1, 1, 1, 4]
+    actual = se2_bulk.has_more_many(lst1, lst2, [1, 2, 3, 4, 6])
+    check_equals(actual, {1: False, 2: True, 3: True, 4: False, 6: False})
+
+def test_has_more_many_2():
+    lst1 = np.array([1, 1, 2, 2, 3, 5, -7])
+    lst2 = np.array([2, 1, 1, 1, 1, 4])
+    actual = se2_bulk.has_more_many(lst1, lst2, [1, 2, 3, 4, 6, -7])
+    check_equals(actual, {1: False, 2: True, 3: True, 4: False, 6: False, -7: True})
+
+def test_has_more_many_3():
+    actual = se2_bulk.has_more_many(np.array([], dtype=int), np.array([1]), [1, 2])
+    check_equals(actual, {1: False, 2: False})
+
+def test_has_more_early_exit_1():
+    for lst1, lst2, target, expected in has_more_cases:
+        actual = se2_bulk.has_more_early_exit(lst1, lst2, target)
+        check_equals(actual, expected, gen_recreate_msg(MODULE, "has_more_early_exit",
+                                                        *(lst1, lst2, target)))
+
+def test_replace_many_1():
+    do_test_replace_many(lst=[], replacements={1: 2}, expected=[])
+
+def test_replace_many_2():
+    do_test_replace_many(lst=[1, 2, 3, 4, 1], replacements={1: 2, 2: 1, 5: 0},
+                         expected=[2, 1, 3, 4, 2])
+
+def test_replace_many_3():
+    do_test_replace_many(lst=["a", 2, "b"], replacements={"a": "b", "b": "c"},
+                         expected=["b", 2, "c"])
+
+def test_replace_many_4():
+    do_test_replace_many(lst=np.array([1, 2, 3, 4, 1]), replacements={1: 2, 2: 1, 5: 0},
+                         expected=[2, 1, 3, 4, 2])
+
+def test_replace_many_5():
+    do_test_replace_many(lst=array.array("d", [1.5, 2, 3, 4]), replacements={4: 0, 1.5: -1},
+                         expected=[-1, 2, 3, 0])
+
+def test_replace_many_6():
+    # Replacers that would change when stored in the array are rejected
+    for lst, replacements in [(np.array([1, 2, 3]), {2: 2.7}),
+                              (np.array([1, 2, 3], dtype=np.int8), {2: 300}),
+                              (array.array("i", [1, 2, 3]), {2: 2.5}),
+                              (np.array([1, 2, 3]), {1: 4, 2: "x"})]:
+        before = list(lst)
+        with pytest.raises(TypeError):
+            se2_bulk.replace_many(lst, replacements)
+        check_equals(list(lst), before)
+    do_test_replace_many(lst=np.array([1.0, 2.0]), replacements={2: 5, 1: np.float32(0.5)},
+                         expected=[0.5, 5.0])
+
+def test_make_star_strings_fast_1():
+    lst = [2, 1, 5, 3, 3, 0]
+    actual = se2_bulk.make_star_strings_fast(lst)
+    check_equals(actual, ["**", "*", "*****", "***", "***", ""])
+    assert actual[3] is actual[4], "Star strings of the same width should be shared"
+
+def test_make_star_strings_stream_1():
+    lst = (n for n in [1, 2, 3, 2, 0])
+    actual = se2_bulk.iter_star_strings(lst)
+    check_equals(list(actual), ["*", "**", "***", "**", ""])
+
+def test_make_star_strings_stream_2():
+    f = io.StringIO()
+    actual = se2_bulk.write_star_strings([1, 2, 3, 2, 0], f)
+    check_expected_none(actual)
+    check_equals(f.getvalue(), "*\n**\n***\n**\n\n")
+
+def test_make_star_strings_stream_3():
+    # Only the most recently used widths are kept
+    for n in range(2 * se2_bulk.STAR_CACHE_SIZE):
+        check_equals(se2_bulk.star_string(n), "*" * n)
+    check_equals(se2_bulk.star_string.cache_info().currsize, se2_bulk.STAR_CACHE_SIZE)
+
+grid0 = [[2, 1, 1, 2],
+         [1, 2, 3, 1],
+         [3, 3, 1, 2],
+         [1, 2, 1, 3]]
+
+rows_and_columns_cases = [([[1, 2], [3, 1]], 1, True), ([[1, 2], [3, 1]], 2, False),
+                          ([[1, 2], [3, 2]], 2, False),
+                          ([[2, 1, 2], [1, 3, 1], [2, 2, 3]], 2, False),
+                          ([[3, 1, 2], [1, 3, 1], [2, 2, 3]], 3, True),
+                          ([[2, 1, 1], [3, 2, 3], [2, 1, 3]], 2, False),
+                          ([[2, 1, 1], [1, 2, 3], [2, 1, 3]], 1, True),
+                          (grid0, 1, True), (grid0, 2, False), (grid0, 3, False),
+                          ([[1, 2], [3, 1], [1, 3]], 1, True),
+                          ([[1, 2], [3, 1], [1, 3]], 3, False)]
+
+def test_rows_and_columns_contain_fast_1():
+    for grid, target, expected in rows_and_columns_cases:
+        do_test_rows_and_columns_contain_fast(grid=grid, target=target, expected=expected)
+
+def test_rows_and_columns_contain_fast_2():
+    for grid, target, expected in rows_and_columns_cases:
+        do_test_rows_and_columns_contain_fast(grid=np.array(grid), target=target,
+                                              expected=expected)
+
+def test_rows_and_columns_contain_many_1():
+    actual = se2_bulk.rows_and_columns_contain_many(grid0, [1, 2, 3, 4])
+    check_equals(actual, {1: True, 2: False, 3: False, 4: False})
+
+def test_rows_and_columns_contain_many_2():
+    grid = [[3, 1, 2], [1, 3, 2], [2, 2, 3]]
+    actual = se2_bulk.rows_and_columns_contain_many(grid, [1, 2, 3])
+    check_equals(actual, {1: False, 2: True, 3: True})
+
+def test_rows_and_columns_contain_stream_1():
+    for grid, target, expected in rows_and_columns_cases:
+        rows = (iter(row) for row in grid)
+        do_test_rows_and_columns_contain_fast(grid=rows, target=target, expected=expected)
+
+def test_rows_and_columns_contain_stream_2():
+    rows = csv.reader(io.StringIO("1,2,3\n3,1,2\n2,3,1\n"))
+    do_test_rows_and_columns_contain_fast(grid=rows, target="1", expected=True)
+
+def test_rows_and_columns_contain_stream_3():
+    grid = [[1, 2, 3], [3, 1, 2], [2, 1]]
+    with pytest.raises(ValueError, match="Row 2 has 2 columns"):
+        se2_bulk.rows_and_columns_contain_fast(iter(grid), 1)
+    with pytest.raises(ValueError, match="Row 2 has 2 columns"):
+        se2_bulk.rows_and_columns_contain_many(iter(grid), [1, 2])
+
+def test_rows_and_columns_contain_stream_4():
+    do_test_rows_and_columns_contain_fast(grid=iter([]), target=1, expected=True)
+    check_equals(se2_bulk.rows_and_columns_contain_many(iter([]), [1]), {1: True})
+
+# # #
+#
+# HELPER FUNCTIONS
+#
+# # #
+
+def gen_recreate_msg(module, function, *params):
+    params_str = ", ".join([str(p) for p in params])
+
+    recreate_msg = "To recreate this test in ipython3 run:\n"
+    recreate_msg += "  {}.{}({})".format(module, function, params_str)
+
+    return recreate_msg
+
+
+def check_none(actual, recreate_msg=None):
+    msg = "The function returned None."
+    msg += " Did you forget to replace the placeholder value we provide?"
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert actual is not None, msg
+
+def check_expected_none(actual, recreate_msg=None):
+    msg = "The function is expected to return None."
+    msg += " Your function returns: {}".format(actual)
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert actual is None, msg
+
+
+def check_type(actual, expected, recreate_msg=None):
+    actual_type = type(actual)
+    expected_type = type(expected)
+
+    msg = "The function returned a value of the wrong type.\n"
+    msg += "  Expected return type: {}.\n".format(expected_type.__name__)
+    msg += "  Actual return type: {}.".format(actual_type.__name__)
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert isinstance(actual, expected_type), msg
+
+
+def check_equals(actual, expected, recreate_msg=None):
+    msg = "Actual ({}) and expected ({}) values do not match.".format(actual, expected)
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert actual == expected, msg
+
+
+def check_list_unmodified(param_name, before, after, recreate_msg=None):
+    msg = "You modified the contents of {} (this is not allowed).\n".format(param_name)
+    msg += "  Value before your code: {}\n".format(before)
+    msg += "  Value after your code:  {}".format(after)
+    if recreate_msg is not None:
+        msg += "\n" + recreate_msg
+
+    assert before == after, msg
+
+
+# # #
+#
+# TEST HELPERS
+#
+# # #
+
+
+def do_test_peep_fast(p, e, expected):
+    recreate_msg = gen_recreate_msg(MODULE, "peep_fast", *(p, e))
+
+    actual = se2_bulk.peep_fast(p, e)
+
+    check_none(actual, recreate_msg)
+    check_type(actual, expected, recreate_msg)
+    check_equals(actual, expected, recreate_msg)
+
+
+def do_test_replace_many(lst, replacements, expected):
+    recreate_msg = gen_recreate_msg(MODULE, "replace_many", *(lst, replacements))
+
+    actual = se2_bulk.replace_many(lst, replacements)
+
+    check_expected_none(actual, recreate_msg)
+    check_equals(list(lst), expected, recreate_msg)
+
+
+def do_test_rows_and_columns_contain_fast(grid, target, expected):
+    recreate_msg = "  grid = {!r}\n".format(grid)
+    recreate_msg += gen_recreate_msg(MODULE, "rows_and_columns_contain_fast", *("grid", target))
+
+    actual = se2_bulk.rows_and_columns_contain_fast(grid, target)
+
+    check_none(actual, recreate_msg)
+    check_type(actual, expected, recreate_msg)
+    check_equals(actual, expected, recreate_msg)
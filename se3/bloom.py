@@ -0,0 +1,175 @@
+"""
+A Bloom filter over candidate IDs, for dropping contribution rows for
+other candidates before they are parsed.
+
+A Bloom filter answers "is this key in the set?" with no false
+negatives and a configurable rate of false positives, using a few bits
+per key. prefilter_lines uses one to discard records of a CSV file
+whose key column is definitely not in the set, looking only at the raw
+text of the record, so that only the remaining records go through the
+CSV parser and into dictionaries.
+"""
+
+import csv
+import hashlib
+import math
+
+
+# Number of distinct key values whose membership prefilter_lines remembers
+MEMO_SIZE = 100000
+
+
+class BloomFilter(object):
+    """
+    A Bloom filter for strings.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Constructor.
+
+        Creates an empty filter sized so that, with capacity keys, a
+        key that was not added is reported as present with probability
+        error_rate.
+
+        Parameters
+        - capacity: (int) the expected number of keys
+        - error_rate: (float) the false positive rate, between 0 and 1
+        """
+
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def from_keys(cls, keys, error_rate=0.01):
+        """
+        Build a filter that holds the given keys.
+
+        Parameters
+        - keys: list of strings
+        - error_rate: (float) the false positive rate
+
+        Returns: BloomFilter
+        """
+
+        keys = list(keys)
+        bloom = cls(len(keys), error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key):
+        # Double hashing: the i-th position is h1 + i * h2
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """
+        Add a key to the filter.
+        """
+
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7))
+                   for pos in self._positions(key))
+
+    @property
+    def bytes_per_key(self):
+        """
+        The size of the filter, in bytes, divided by its capacity.
+        """
+
+        return len(self._bits) / self.capacity
+
+    def __repr__(self):
+        return "BloomFilter(capacity={}, error_rate={}, {:.2f} bytes/key)".format(
+            self.capacity, self.error_rate, self.bytes_per_key)
+
+
+def line_field(line, column):
+    '''
+    Extract one field from a line of a CSV file, splitting on commas
+    unless the line has quoted fields.
+
+    Inputs:
+      line (string): the line
+      column (int): the index of the field
+
+    Returns: the field (string), or None if the line is too short
+    '''
+
+    if '"' in line:
+        fields = next(csv.reader([line]), [])
+    else:
+        fields = line.rstrip("\r\n").split(",", column + 1)
+    if column < len(fields):
+        return fields[column]
+    return None
+
+
+def prefilter_lines(lines, keys, column):
+    '''
+    Discard the records of a CSV file (without its header) whose field
+    in the given column is not in keys.
+
+    A record that has a quoted field with a newline in it spans several
+    lines. Those lines are kept or discarded together: a line that
+    leaves a quoted field open (an odd number of quotes so far) is
+    joined with the lines that follow until the field is closed.
+
+    Inputs:
+      lines: iterable of lines (strings)
+      keys: a BloomFilter (or any collection that supports "in")
+      column (int): the index of the key column
+
+    Returns: generator of the lines that may belong to a record with a
+      key in keys. Blank and short lines are kept, and left to the CSV
+      parser, as are the lines of a record whose quoted field is never
+      closed.
+    '''
+
+    # Key columns repeat a lot (many contributions per candidate), so
+    # remember the answer for up to MEMO_SIZE distinct values
+    decided = {}
+    # The lines of a record that spans several lines, and the number
+    # of quotes in them
+    pending = []
+    num_quotes = 0
+    for line in lines:
+        if pending or line.count('"') % 2 == 1:
+            pending.append(line)
+            num_quotes += line.count('"')
+            if num_quotes % 2 == 1:
+                continue
+            record_lines = pending
+            record = "".join(pending)
+            pending = []
+            num_quotes = 0
+        else:
+            record_lines = [line]
+            record = line
+
+        value = line_field(record, column)
+        if value is None:
+            yield from record_lines
+            continue
+        keep = decided.get(value)
+        if keep is None:
+            keep = value in keys
+            if len(decided) < MEMO_SIZE:
+                decided[value] = keep
+        if keep:
+            yield from record_lines
+
+    yield from pending
@@ -0,0 +1,169 @@
+"""
+Count the donations received by each candidate in a contributions file,
+without loading the file into memory.
+
+The file is split into byte ranges that start and end on line
+boundaries, each range is counted in a separate process, and the partial
+counts are merged. The result is the cand_to_count dictionary that
+se3.find_successful_fund_raisers expects.
+
+The rows of the file must not contain quoted newlines (the files in
+tests/ do not), since ranges are split at newline characters.
+"""
+
+import csv
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import bloom
+
+
+# Target size of the byte range counted by each task
+CHUNK_SIZE = 64 * 2**20
+
+
+def read_header(filename):
+    '''
+    Read the header of a CSV file.
+
+    Inputs:
+      filename (string): the name of the file
+
+    Returns: the column names (list of strings) and the byte offset
+      of the first row after the header
+    '''
+
+    with open(filename, "rb") as f:
+        line = f.readline()
+    return next(csv.reader([line.decode()])), len(line)
+
+
+def line_ranges(filename, num_ranges):
+    '''
+    Split the rows of a CSV file (after the header) into byte ranges
+    that start and end on line boundaries.
+
+    Inputs:
+      filename (string): the name of the file
+      num_ranges (int): the number of ranges to aim for. Fewer ranges
+        are returned if the file has fewer lines.
+
+    Returns: list of (start, end) byte offsets
+    '''
+
+    _, start = read_header(filename)
+    size = os.path.getsize(filename)
+    step = max(1, (size - start) // max(1, num_ranges))
+
+    boundaries = [start]
+    with open(filename, "rb") as f:
+        for pos in range(start + step, size, step):
+            if pos <= boundaries[-1]:
+                continue
+            # Move to the start of the next line
+            f.seek(pos - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+    boundaries.append(size)
+
+    return [(lb, ub) for lb, ub in zip(boundaries, boundaries[1:]) if lb < ub]
+
+
+def iter_lines(filename, start, end):
+    '''
+    Read the lines of a file that start in a byte range.
+
+    Inputs:
+      filename (string): the name of the file
+      start (int): byte offset of the start of a line
+      end (int): byte offset where the range ends
+
+    Returns: generator of lines (strings)
+    '''
+
+    with open(filename, "rb") as f:
+        f.seek(start)
+        pos = start
+        for line in f:
+            if pos >= end:
+                break
+            pos += len(line)
+            yield line.decode()
+
+
+def count_range(filename, start, end, column, prefilter=None):
+    '''
+    Count the rows in a byte range of a CSV file by the value of
+    one column.
+
+    Inputs:
+      filename (string): the name of the file
+      start (int): byte offset of the start of a line
+      end (int): byte offset where the range ends
+      column (int): the index of the column
+      prefilter: a bloom.BloomFilter (or a set) of values, or None.
+        If given, lines whose value is not in prefilter are dropped
+        before they are parsed.
+
+    Returns: Counter
+    '''
+
+    lines = iter_lines(filename, start, end)
+    if prefilter is not None:
+        lines = bloom.prefilter_lines(lines, prefilter, column)
+
+    counts = Counter()
+    for row in csv.reader(lines):
+        if row:
+            counts[row[column]] += 1
+    return counts
+
+
+def count_donations(filename, num_processes=None, chunk_size=CHUNK_SIZE,
+                    field="Cand_ID", prefilter=None):
+    '''
+    Construct a dictionary that maps each candidate ID to the number of
+    contributions for that candidate in a contributions file.
+
+    Inputs:
+      filename (string): the name of the file
+      num_processes (int): the number of worker processes (defaults to
+        the number of CPUs). With 1, everything runs in this process.
+      chunk_size (int): the target size, in bytes, of each range of
+        the file counted by one task
+      field (string): the column that identifies the candidate
+      prefilter: a bloom.BloomFilter (or a set) of the candidate IDs
+        of interest, or None to count every candidate. With a Bloom
+        filter, a few other candidates may be counted as well (at the
+        filter's false positive rate).
+
+    Returns: dictionary that maps candidate IDs (strings) to integers
+    '''
+
+    fields, _ = read_header(filename)
+    if field not in fields:
+        raise ValueError("{} has no {} column".format(filename, field))
+    column = fields.index(field)
+
+    if num_processes is None:
+        num_processes = os.cpu_count() or 1
+    size = os.path.getsize(filename)
+    num_ranges = max(num_processes, -(-size // chunk_size))
+    ranges = line_ranges(filename, num_ranges)
+
+    counts = Counter()
+    if num_processes == 1:
+        for start, end in ranges:
+            counts.update(count_range(filename, start, end, column, prefilter))
+    else:
+        with ProcessPoolExecutor(num_processes) as pool:
+            futures = [pool.submit(count_range, filename, start, end, column,
+                                   prefilter)
+                       for start, end in ranges]
+            for future in futures:
+                counts.update(future.result())
+
+    return dict(counts)
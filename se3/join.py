@@ -0,0 +1,191 @@
+"""
+Join candidates with their contributions (or, in general, two streams
+of rows) on a key column.
+
+hash_join keeps the left rows (e.g., the candidates) in a hash table
+and streams the right rows. sort_merge_join sorts both inputs in runs
+that are spilled to temporary files, merges them, and matches rows with
+equal keys, so neither input needs to fit in memory.
+
+Both functions yield the joined rows one at a time. A joined row has
+the columns of the left row and the columns of the right row. Right
+columns that have the same name as a left column get right_suffix
+appended to their name (e.g., City and City_right).
+"""
+
+import heapq
+import itertools
+import os
+import pickle
+import tempfile
+
+
+# Number of rows sorted in memory before a run is written to disk
+RUN_SIZE = 100000
+
+# Largest number of runs merged at once (each one holds an open file)
+MERGE_FANIN = 64
+
+
+def join_rows(left_row, right_row, right_suffix):
+    '''
+    Combine a left row and a right row into one dictionary.
+
+    Inputs:
+      left_row (dictionary): the left row
+      right_row (dictionary): the right row
+      right_suffix (string): added to right column names that are
+        also left column names
+
+    Returns: dictionary
+    '''
+
+    joined = dict(left_row)
+    for field, value in right_row.items():
+        if field in left_row:
+            field += right_suffix
+        joined[field] = value
+    return joined
+
+
+def hash_join(left, right, left_key, right_key, right_suffix="_right"):
+    '''
+    Join two collections of rows in memory. Only the left rows are
+    stored, so left should be the smaller input.
+
+    Inputs:
+      left: iterable of rows (e.g., candidates)
+      right: iterable of rows (e.g., contributions)
+      left_key (string): the column to join on in the left rows
+        (e.g., "Candidate_ID")
+      right_key (string): the column to join on in the right rows
+        (e.g., "Cand_ID")
+      right_suffix (string): added to right column names that are
+        also left column names
+
+    Returns: generator of joined rows, in the order of the right rows
+    '''
+
+    table = {}
+    for row in left:
+        table.setdefault(row[left_key], []).append(row)
+
+    for right_row in right:
+        for left_row in table.get(right_row[right_key], []):
+            yield join_rows(left_row, right_row, right_suffix)
+
+
+def write_run(rows, tmpdir):
+    '''
+    Write a sorted run of rows to a temporary file.
+
+    Returns: the name of the file
+    '''
+
+    fd, filename = tempfile.mkstemp(dir=tmpdir, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        for row in rows:
+            pickle.dump(row, f, pickle.HIGHEST_PROTOCOL)
+    return filename
+
+
+def read_run(filename):
+    '''
+    Read the rows of a run written by write_run.
+
+    Returns: generator of rows
+    '''
+
+    with open(filename, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def external_sort(rows, key, tmpdir, run_size=RUN_SIZE, fanin=MERGE_FANIN):
+    '''
+    Sort rows by a column, keeping at most run_size rows in memory.
+
+    Inputs:
+      rows: iterable of rows
+      key (string): the column to sort by
+      tmpdir (string): directory for the runs
+      run_size (int): the number of rows in each run
+      fanin (int): the largest number of runs merged at once. While
+        there are more runs than this, groups of fanin runs are merged
+        into new runs, so at most fanin run files are open at a time.
+
+    Returns: iterator over the sorted rows
+    '''
+
+    def sort_key(row):
+        return row[key]
+
+    runs = []
+    rows = iter(rows)
+    while True:
+        run = sorted(itertools.islice(rows, run_size), key=sort_key)
+        if len(run) < run_size and not runs:
+            # Everything fits in one run, so nothing needs to be spilled
+            return iter(run)
+        if run:
+            runs.append(write_run(run, tmpdir))
+        if len(run) < run_size:
+            break
+
+    if fanin < 2:
+        raise ValueError("fanin must be at least 2")
+    while len(runs) > fanin:
+        group, runs = runs[:fanin], runs[fanin:]
+        merged = heapq.merge(*[read_run(run) for run in group], key=sort_key)
+        runs.append(write_run(merged, tmpdir))
+        for run in group:
+            os.remove(run)
+
+    return heapq.merge(*[read_run(run) for run in runs], key=sort_key)
+
+
+def sort_merge_join(left, right, left_key, right_key, right_suffix="_right",
+                    run_size=RUN_SIZE, fanin=MERGE_FANIN):
+    '''
+    Join two streams of rows that may not fit in memory. Both inputs
+    are sorted externally, and only the left rows that share one key
+    are held in memory at a time.
+
+    Inputs:
+      left: iterable of rows (e.g., candidates)
+      right: iterable of rows (e.g., contributions)
+      left_key (string): the column to join on in the left rows
+      right_key (string): the column to join on in the right rows
+      right_suffix (string): added to right column names that are
+        also left column names
+      run_size (int): the number of rows sorted in memory at a time
+      fanin (int): the largest number of runs merged at once for each
+        input (so at most 2 * fanin run files are open at a time)
+
+    Returns: generator of joined rows, in order of the key
+    '''
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        left_groups = itertools.groupby(
+            external_sort(left, left_key, tmpdir, run_size, fanin),
+            key=lambda row: row[left_key])
+        right_groups = itertools.groupby(
+            external_sort(right, right_key, tmpdir, run_size, fanin),
+            key=lambda row: row[right_key])
+
+        left_value, left_rows = next(left_groups, (None, None))
+        for right_value, right_rows in right_groups:
+            while left_rows is not None and left_value < right_value:
+                left_value, left_rows = next(left_groups, (None, None))
+            if left_rows is None:
+                break
+            if left_value == right_value:
+                # Hold the left rows for this key, since they are
+                # matched with every right row
+                left_rows = list(left_rows)
+                for right_row in right_rows:
+                    for left_row in left_rows:
+                        yield join_rows(left_row, right_row, right_suffix)
@@ -0,0 +1,159 @@
+"""
+Compact representation for rows of the candidate and contribution files.
+
+test_helpers.read_CSV_file returns one dictionary per row. The records
+produced here behave like those dictionaries (they can be indexed by
+column name, compared to dictionaries, etc.) but store the values of a
+row in a single tuple and share one copy of the strings that repeat
+from row to row (states, parties, cities, ...).
+"""
+
+import csv
+import itertools
+from collections.abc import Mapping
+
+import bloom
+
+
+# Columns whose values repeat from row to row. Rows share one copy of
+# each value.
+INTERN_FIELDS = ("State", "Party", "City", "District",
+                 "Cand_ID", "Month", "Year", "Zipcode")
+
+_record_types = {}
+
+
+def record_type(fields):
+    """
+    Get the record class for rows with the given column names.
+
+    Inputs:
+      fields (list of strings): the column names
+
+    Returns: a subclass of Mapping
+    """
+
+    fields = tuple(fields)
+    if fields in _record_types:
+        return _record_types[fields]
+
+    positions = {field: i for i, field in enumerate(fields)}
+
+    class Record(Mapping):
+        """
+        A read-only row of a CSV file, indexed by column name.
+        """
+
+        __slots__ = ("_values",)
+
+        def __init__(self, values):
+            self._values = values
+
+        def __getitem__(self, field):
+            try:
+                return self._values[positions[field]]
+            except KeyError:
+                raise KeyError(field) from None
+
+        def __iter__(self):
+            return iter(fields)
+
+        def __len__(self):
+            return len(fields)
+
+        def __contains__(self, field):
+            return field in positions
+
+        def __repr__(self):
+            return repr(dict(self))
+
+        def __reduce__(self):
+            return (make_record, (fields, self._values))
+
+    Record.fields = fields
+    _record_types[fields] = Record
+    return Record
+
+
+def make_record(fields, values):
+    """
+    Construct a record from column names and a tuple of values.
+    """
+
+    return record_type(fields)(values)
+
+
+def iter_CSV_records(filename, intern_fields=INTERN_FIELDS,
+                     prefilter=None, prefilter_field="Cand_ID"):
+    '''
+    Read the rows of a CSV file one at a time, as records.
+
+    Inputs:
+      filename (string): the name of the file
+      intern_fields (list of strings): columns whose values should be
+        shared between rows
+      prefilter: a bloom.BloomFilter (or a set) of values. If given,
+        records whose prefilter_field is not in prefilter are dropped
+        before they are parsed (records with quoted newlines are kept
+        or dropped whole; see bloom.prefilter_lines).
+      prefilter_field (string): the column checked against prefilter
+
+    Returns: generator of records
+    '''
+
+    with open(filename) as f:
+        lines = f
+        if prefilter is not None:
+            header = next(f, "")
+            column = next(csv.reader([header])).index(prefilter_field)
+            lines = itertools.chain([header],
+                                    bloom.prefilter_lines(f, prefilter, column))
+        yield from records_from_reader(csv.reader(lines), intern_fields)
+
+
+def records_from_reader(reader, intern_fields=INTERN_FIELDS):
+    '''
+    Convert the rows produced by a csv.reader, starting with the header,
+    into records.
+
+    Inputs:
+      reader: iterator over lists of strings (e.g., a csv.reader)
+      intern_fields (list of strings): columns whose values should be
+        shared between rows
+
+    Returns: generator of records
+    '''
+
+    fields = next(reader, None)
+    if fields is None:
+        return
+    Record = record_type(fields)
+    num_fields = len(fields)
+    shared = [{} if field in intern_fields else None for field in fields]
+
+    for row in reader:
+        # Skip blank lines, like csv.DictReader
+        if not row:
+            continue
+        if len(row) < num_fields:
+            row += [None] * (num_fields - len(row))
+        elif len(row) > num_fields:
+            msg = "Row {!r} has {} values, but there are {} columns"
+            raise ValueError(msg.format(row, len(row), num_fields))
+        yield Record(tuple([v if s is None else s.setdefault(v, v)
+                            for v, s in zip(row, shared)]))
+
+
+def read_CSV_records(filename, intern_fields=INTERN_FIELDS):
+    '''
+    Load the data from a CSV file as a list of records.
+
+    Inputs:
+      filename (string): the name of the file
+      intern_fields (list of strings): columns whose values should be
+        shared between rows
+
+    Returns: list of records
+    '''
+
+    return list(iter_CSV_records(filename, intern_fields))
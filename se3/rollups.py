@@ -0,0 +1,166 @@
+"""
+Typed columns and precomputed totals for contribution files.
+
+load_contribution_columns converts the Amount, Month, and Year fields
+to numbers once, when the file is loaded. ContributionRollups uses the
+columns to precompute the sum, count, and mean of the amounts by
+candidate, by state, and by month, along with running totals over time
+for each candidate, so that the total for a candidate over any range
+of months is answered without looking at the rows again.
+"""
+
+import csv
+
+import numpy as np
+
+
+# Types of the numeric columns. The remaining columns are strings.
+NUMERIC_FIELDS = {"Amount": np.float64, "Month": np.int64, "Year": np.int64}
+
+# Range of years accepted by ContributionRollups. The running totals
+# have a column for every month between the first and last month in
+# the data, so a single bad year would make them very large.
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+
+def load_contribution_columns(filename):
+    '''
+    Load a contributions file as a dictionary of NumPy arrays, one per
+    column. Amount, Month, and Year are converted to numbers; the other
+    columns are arrays of strings.
+
+    Inputs:
+      filename (string): the name of the file
+
+    Returns: dictionary that maps column names to arrays
+    '''
+
+    with open(filename) as f:
+        reader = csv.reader(f)
+        fields = next(reader)
+        values = [[] for _ in fields]
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != len(fields):
+                msg = "Line {} of {} has {} values, but there are {} columns"
+                raise ValueError(msg.format(reader.line_num, filename, len(row), len(fields)))
+            for column, value in zip(values, row):
+                column.append(value)
+
+    return {field: np.array(column, dtype=NUMERIC_FIELDS.get(field, str))
+            for field, column in zip(fields, values)}
+
+
+def group_totals(keys, amounts):
+    '''
+    Compute the sum, count, and mean of the amounts for each key.
+
+    Inputs:
+      keys: array of keys
+      amounts: array of amounts, with the same length as keys
+
+    Returns: dictionary that maps each key to a dictionary with
+      "sum", "count", and "mean" entries
+    '''
+
+    unique, groups = np.unique(keys, return_inverse=True)
+    sums = np.bincount(groups, weights=amounts, minlength=len(unique))
+    counts = np.bincount(groups, minlength=len(unique))
+
+    return {key: {"sum": float(total), "count": int(count),
+                  "mean": float(total) / int(count)}
+            for key, total, count in zip(unique.tolist(), sums, counts)}
+
+
+class ContributionRollups(object):
+    """
+    Sums, counts, and means of contribution amounts, precomputed by
+    candidate, by state, and by (year, month).
+    """
+
+    def __init__(self, columns):
+        """
+        Constructor.
+
+        Parameters
+        - columns: dictionary of arrays, as returned by
+            load_contribution_columns
+        """
+
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("The columns have different lengths")
+        for field, lb, ub in [("Month", 1, 12), ("Year", MIN_YEAR, MAX_YEAR)]:
+            bad = np.flatnonzero((columns[field] < lb) | (columns[field] > ub))
+            if len(bad) > 0:
+                msg = "Row {} has {} {}, which is not between {} and {}"
+                raise ValueError(msg.format(bad[0], field, columns[field][bad[0]], lb, ub))
+
+        amounts = columns["Amount"]
+        # Months since year 0, so that consecutive months are consecutive
+        periods = columns["Year"] * 12 + (columns["Month"] - 1)
+
+        self.by_candidate = group_totals(columns["Cand_ID"], amounts)
+        self.by_state = group_totals(columns["State"], amounts)
+        self.by_month = {(period // 12, period % 12 + 1): totals
+                         for period, totals in group_totals(periods, amounts).items()}
+
+        # Running totals for each candidate over every month from the
+        # first month in the data to the last one. Column p + 1 of
+        # _amount_prefix holds the total through month first_period + p.
+        cand_ids, cands = np.unique(columns["Cand_ID"], return_inverse=True)
+        self._cand_rows = {cand_id: i for i, cand_id in enumerate(cand_ids.tolist())}
+        if len(periods) > 0:
+            self._first_period = int(periods.min())
+            num_periods = int(periods.max()) - self._first_period + 1
+        else:
+            self._first_period = 0
+            num_periods = 0
+
+        cells = cands * num_periods + (periods - self._first_period)
+        size = len(cand_ids) * num_periods
+        shape = (len(cand_ids), num_periods)
+        monthly_amounts = np.bincount(cells, weights=amounts, minlength=size)
+        monthly_counts = np.bincount(cells, minlength=size)
+
+        self._amount_prefix = np.zeros((len(cand_ids), num_periods + 1))
+        self._amount_prefix[:, 1:] = np.cumsum(monthly_amounts.reshape(shape), axis=1)
+        self._count_prefix = np.zeros((len(cand_ids), num_periods + 1), dtype=np.int64)
+        self._count_prefix[:, 1:] = np.cumsum(monthly_counts.reshape(shape), axis=1)
+
+    def _prefix_column(self, year, month):
+        """
+        Find the column of the running totals that holds the total
+        before the given month, clipped to the months in the data.
+        """
+
+        p = year * 12 + (month - 1) - self._first_period
+        return min(max(p, 0), self._amount_prefix.shape[1] - 1)
+
+    def candidate_total(self, cand_id, start, end):
+        """
+        Compute the total amount and number of contributions for a
+        candidate from the start month to the end month (inclusive),
+        in constant time.
+
+        Inputs:
+            cand_id (string): the candidate ID
+            start (int, int): a tuple of the form (year, month)
+            end (int, int): a tuple of the form (year, month)
+
+        Returns: a tuple of the total amount (float) and the number of
+            contributions (int)
+        """
+
+        if cand_id not in self._cand_rows or tuple(start) > tuple(end):
+            return (0.0, 0)
+
+        row = self._cand_rows[cand_id]
+        lb = self._prefix_column(*start)
+        # The total before the month after end is the total through end
+        ub = self._prefix_column(end[0], end[1] + 1)
+
+        return (float(self._amount_prefix[row, ub] - self._amount_prefix[row, lb]),
+                int(self._count_prefix[row, ub] - self._count_prefix[row, lb]))
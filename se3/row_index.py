@@ -0,0 +1,309 @@
+"""
+Random access to the rows of a large CSV file.
+
+A row-offset index (the byte offset of the start of every row) is
+written next to the CSV file, in <file>.offsets, as an array of 64-bit
+integers. Both files are memory-mapped, so fetching row i only reads
+that row. Secondary indexes, written to <file>.<column>.index, map
+each value of a column (e.g., Cand_ID) to the numbers of the rows with
+that value: the row numbers are stored grouped by value as 64-bit
+integers and memory-mapped, and a small table gives the position and
+count of each value's group, so a lookup only reads that group.
+
+Each index records the size and modification time of the CSV file it
+was built from, and is rebuilt automatically when either changes. The
+index files are written to a temporary file and then renamed, so an
+interrupted build never leaves a partial index behind. Rows must not
+contain quoted newlines, since rows are split at newline characters.
+"""
+
+import array
+import csv
+import json
+import mmap
+import os
+
+
+OFFSETS_SUFFIX = ".offsets"
+
+# Number of 64-bit integers before the offsets in an offsets file:
+# the size and modification time (in ns) of the CSV file
+OFFSETS_HEADER = 2
+
+SECONDARY_SUFFIX = ".index"
+
+# Number of 64-bit integers before the table in a secondary index file:
+# the size and modification time of the CSV file, and the length of the
+# table in bytes
+SECONDARY_HEADER = 3
+
+
+def file_version(filename):
+    '''
+    Identify the version of a file that an index was built from.
+
+    Inputs:
+      filename (string): the name of the file
+
+    Returns: a tuple of the size and modification time (in ns)
+    '''
+
+    st = os.stat(filename)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def write_atomic(filename, data):
+    '''
+    Replace the contents of a file, writing them to a temporary file
+    first so that readers never see a partial file.
+
+    Inputs:
+      filename (string): the name of the file
+      data (bytes): the new contents
+    '''
+
+    tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    try:
+        with open(tmp_filename, "wb") as f:
+            f.write(data)
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
+def build_offsets(filename):
+    '''
+    Write the row-offset index for a CSV file. The index holds the
+    size and modification time of the file, then the offset of each
+    non-blank row after the header, followed by the size of the file.
+
+    Inputs:
+      filename (string): the name of the file
+
+    Returns: array.array of offsets (without the size and
+      modification time)
+    '''
+
+    # Taken before reading, so that a change made while the index is
+    # being built makes the index stale
+    version = file_version(filename)
+    offsets = array.array("q")
+    with open(filename, "rb") as f:
+        pos = len(f.readline())
+        for line in f:
+            if line.strip():
+                offsets.append(pos)
+            pos += len(line)
+    offsets.append(pos)
+
+    write_atomic(filename + OFFSETS_SUFFIX,
+                 array.array("q", version).tobytes() + offsets.tobytes())
+    return offsets
+
+
+class RowIndex(object):
+    """
+    A CSV file opened for random access to its rows.
+    """
+
+    def __init__(self, filename, index_fields=()):
+        """
+        Constructor.
+
+        Opens the file and its row-offset index, building the index
+        (and the secondary indexes) if they are missing or stale.
+
+        Parameters
+        - filename: (string) the name of the CSV file
+        - index_fields: (list of strings) columns to build secondary
+            indexes on, e.g. ["Cand_ID"]
+        """
+
+        self.filename = filename
+        version = file_version(filename)
+        size = version[0]
+
+        with open(filename, "rb") as f:
+            self.fields = next(csv.reader([f.readline().decode()]))
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) \
+                if size > 0 else b""
+
+        offsets_filename = filename + OFFSETS_SUFFIX
+        if not self._load_offsets(offsets_filename, version):
+            build_offsets(filename)
+            if not self._load_offsets(offsets_filename, version):
+                raise RuntimeError("{} changed while it was being indexed".format(filename))
+
+        # Maps each indexed field to its table and row numbers, and
+        # lists the memory maps (and views of them) to release
+        self._secondary = {}
+        self._secondary_maps = []
+        for field in index_fields:
+            index_filename = "{}.{}{}".format(filename, field, SECONDARY_SUFFIX)
+            if not self._load_secondary(field, index_filename, version):
+                self._build_secondary(field, index_filename, version)
+                if not self._load_secondary(field, index_filename, version):
+                    raise RuntimeError("{} changed while it was being indexed".format(filename))
+
+    def _load_offsets(self, offsets_filename, version):
+        """
+        Memory-map the row-offset index, if it is up to date.
+
+        Returns: True if the index was loaded, False otherwise
+        """
+
+        try:
+            with open(offsets_filename, "rb") as f:
+                # An empty, truncated, or old-format file is rebuilt
+                length = os.fstat(f.fileno()).st_size
+                if length % 8 != 0 or length // 8 < OFFSETS_HEADER + 1:
+                    return False
+                offsets_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+
+        offsets = memoryview(offsets_map).cast("q")
+        if tuple(offsets[:OFFSETS_HEADER]) == version and offsets[-1] == version[0]:
+            self._offsets_map = offsets_map
+            self._header = offsets
+            self._offsets = offsets[OFFSETS_HEADER:]
+            return True
+        offsets.release()
+        offsets_map.close()
+        return False
+
+    def _load_secondary(self, field, index_filename, version):
+        """
+        Load the secondary index on a column, if it is up to date. The
+        table is read into a dictionary and the row numbers are
+        memory-mapped.
+
+        Returns: True if the index was loaded, False otherwise
+        """
+
+        header_size = SECONDARY_HEADER * 8
+        try:
+            with open(index_filename, "rb") as f:
+                length = os.fstat(f.fileno()).st_size
+                header = array.array("q")
+                header.frombytes(f.read(header_size))
+                if len(header) < SECONDARY_HEADER or tuple(header[:2]) != version:
+                    return False
+                table_size = header[2]
+                start = header_size + table_size
+                if table_size < 0 or start > length or (length - start) % 8 != 0:
+                    return False
+                table = json.loads(f.read(table_size))
+                num_rows = (length - start) // 8
+                if sum(count for _, count in table.values()) != num_rows:
+                    return False
+                rows_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) \
+                    if num_rows > 0 else None
+        except (OSError, ValueError, TypeError, AttributeError):
+            return False
+
+        if rows_map is None:
+            rows = ()
+        else:
+            view = memoryview(rows_map)
+            rows = view[start:].cast("q")
+            self._secondary_maps.append((rows, view, rows_map))
+        self._secondary[field] = (table, rows)
+        return True
+
+    def _build_secondary(self, field, index_filename, version):
+        """
+        Write the secondary index on a column: the header, the table
+        (JSON that maps each value to the position and count of its
+        row numbers), and the row numbers grouped by value.
+        """
+
+        column = self.fields.index(field)
+        groups = {}
+        for i in range(len(self)):
+            value = self._parse(i)[column]
+            if value not in groups:
+                groups[value] = array.array("q")
+            groups[value].append(i)
+
+        table = {}
+        rows = array.array("q")
+        for value, group in groups.items():
+            table[value] = [len(rows), len(group)]
+            rows.extend(group)
+
+        table_bytes = json.dumps(table).encode()
+        # Pad the table so that the row numbers are 8-byte aligned
+        table_bytes += b" " * (-len(table_bytes) % 8)
+        header = array.array("q", version + (len(table_bytes),))
+        write_atomic(index_filename, header.tobytes() + table_bytes + rows.tobytes())
+
+    def _close_offsets(self):
+        self._offsets.release()
+        self._header.release()
+        self._offsets_map.close()
+
+    def close(self):
+        """
+        Release the memory maps.
+        """
+
+        self._close_offsets()
+        for rows, view, rows_map in self._secondary_maps:
+            rows.release()
+            view.release()
+            rows_map.close()
+        self._secondary_maps = []
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _parse(self, i):
+        """
+        Parse row i into a list of strings.
+        """
+
+        line = self._data[self._offsets[i]:self._offsets[i + 1]].decode()
+        return next(csv.reader([line]))
+
+    def __getitem__(self, i):
+        """
+        Fetch row i, or a list of rows if i is a slice.
+
+        Returns: dictionary (or list of dictionaries)
+        """
+
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("row {} out of range".format(i))
+        return dict(zip(self.fields, self._parse(i)))
+
+    def rows_with(self, field, value):
+        """
+        Fetch the rows with a given value in an indexed column, reading
+        only those rows.
+
+        Inputs:
+            field (string): a column with a secondary index
+            value (string): the value to look for
+
+        Returns: list of dictionaries
+        """
+
+        if field not in self._secondary:
+            raise ValueError("No secondary index on {}".format(field))
+        table, rows = self._secondary[field]
+        start, count = table.get(value, (0, 0))
+        return [self[i] for i in rows[start:start + count]]
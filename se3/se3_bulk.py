@@ -0,0 +1,525 @@
+"""
+Short Exercises #3: versions of the exercise functions for repeated
+queries and large inputs
+
+These classes and functions compute the same values as the functions
+in se3.py.
+"""
+
+import bisect
+import heapq
+import itertools
+import operator
+from collections.abc import Mapping
+
+
+# Maps (city, state) pairs, as written in the data or in queries, to
+# their normalized form. Equal normalized keys are the same object.
+_location_keys = {}
+
+
+def location_key(city, state):
+    """
+    Normalize a location, so that locations written with different
+    case or spacing (e.g., "Silver Spring" and "SILVER  SPRING ")
+    have the same key. The normalization of each distinct (city,
+    state) pair is computed once and the result is interned.
+
+    Inputs:
+        city (string): the city name
+        state (string): the state abbreviation
+
+    Returns: a (city, state) tuple, case-folded with spaces collapsed
+    """
+
+    key = _location_keys.get((city, state))
+    if key is None:
+        normalized = (" ".join(city.split()).casefold(), state.strip().casefold())
+        key = _location_keys.setdefault(normalized, normalized)
+        _location_keys[(city, state)] = key
+    return key
+
+
+class CandidateIndex(object):
+    """
+    Hash indexes over a list of candidates, built once and used to
+    answer the se3 queries in time proportional to the size of the
+    result.
+
+    The index keeps a reference to the list of candidates and only
+    tracks appends: candidates appended to the list (directly, or with
+    add) are indexed the next time the index is used. Changes that
+    remove or replace candidates are not detected; call rebuild after
+    making them.
+    """
+
+    def __init__(self, candidates):
+        """
+        Constructor.
+
+        Parameters
+        - candidates: list of candidates (dictionaries or records)
+        """
+
+        self._candidates = candidates
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Index the list of candidates from scratch.
+        """
+
+        self._by_location = {}
+        self._by_location_key = {}
+        self._by_state = {}
+        self._by_id = {}
+        self._num_indexed = 0
+        self._sync()
+
+    def _sync(self):
+        """
+        Index the candidates added to the list since the last call.
+        """
+
+        for cand in self._candidates[self._num_indexed:]:
+            state = cand["State"]
+            location = (cand["City"], state)
+            self._by_location.setdefault(location, []).append(cand)
+            self._by_location_key.setdefault(location_key(*location), []).append(cand)
+            self._by_state.setdefault(state, []).append(cand)
+            self._by_id.setdefault(cand["Candidate_ID"], []).append(cand)
+        self._num_indexed = len(self._candidates)
+
+    def __len__(self):
+        self._sync()
+        return self._num_indexed
+
+    def add(self, candidate):
+        """
+        Append a candidate to the list of candidates and index it.
+
+        Parameters
+        - candidate: dictionary or record
+        """
+
+        self._candidates.append(candidate)
+        self._sync()
+
+    def candidates_with_id(self, cand_id):
+        """
+        Find the candidates with a given candidate ID.
+
+        Inputs:
+            cand_id (string): the candidate ID
+
+        Returns: list of candidates
+        """
+
+        self._sync()
+        return list(self._by_id.get(cand_id, []))
+
+    def find_candidates_from_city(self, office_loc, normalize=False):
+        """
+        Construct a list of the candidate IDs for candidates with a
+        campaign headquartered in the specified location.
+
+        Inputs:
+            office_loc (string, string): a tuple of the form
+                (city name, state abbreviation)
+            normalize (boolean): if True, ignore differences in case
+                and spacing (see location_key)
+
+        Returns: list of candidate IDs (strings)
+        """
+
+        self._sync()
+        if normalize:
+            cands = self._by_location_key.get(location_key(*office_loc), [])
+        else:
+            cands = self._by_location.get(tuple(office_loc), [])
+        return [cand["Candidate_ID"] for cand in cands]
+
+    def construct_homestate_dict(self):
+        """
+        Construct a dictionary that maps a candidate ID to the
+        candidate's home state. If several candidates share an ID, the
+        last one in the list wins.
+
+        Returns: dictionary that maps candidate id (string) to a state
+            abbreviation (string)
+        """
+
+        self._sync()
+        return {cand_id: cands[-1]["State"]
+                for cand_id, cands in self._by_id.items()}
+
+    def construct_cands_by_state(self):
+        """
+        Construct a mapping from states to the candidates from that
+        state.
+
+        Returns: dictionary that maps a state abbreviation (string) to
+            a list of candidates from that state.
+        """
+
+        self._sync()
+        return {state: list(cands) for state, cands in self._by_state.items()}
+
+    def cands_from_state(self, state):
+        """
+        Find the candidates from a state.
+
+        Inputs:
+            state (string): the state abbreviation
+
+        Returns: list of candidates
+        """
+
+        self._sync()
+        return list(self._by_state.get(state, []))
+
+
+class ContributionLocationIndex(object):
+    """
+    An index of contributions by normalized (city, state) location,
+    so that contribution locations can be matched with candidate
+    locations (which are written in upper case) with one dictionary
+    lookup.
+    """
+
+    def __init__(self, contributions):
+        """
+        Constructor.
+
+        Parameters
+        - contributions: iterable of contributions (dictionaries or
+            records)
+        """
+
+        self._by_location_key = {}
+        for contrib in contributions:
+            key = location_key(contrib["City"], contrib["State"])
+            self._by_location_key.setdefault(key, []).append(contrib)
+
+    def contributions_from(self, office_loc):
+        """
+        Find the contributions from a location, ignoring differences in
+        case and spacing.
+
+        Inputs:
+            office_loc (string, string): a tuple of the form
+                (city name, state abbreviation)
+
+        Returns: list of contributions
+        """
+
+        return list(self._by_location_key.get(location_key(*office_loc), []))
+
+    def contributions_from_candidate_city(self, candidate):
+        """
+        Find the contributions from the city where a candidate's
+        campaign is headquartered.
+
+        Inputs:
+            candidate: dictionary or record
+
+        Returns: list of contributions
+        """
+
+        return self.contributions_from((candidate["City"], candidate["State"]))
+
+
+class ZipcodeIndex(object):
+    """
+    An index of candidate or contribution rows by zip code, for
+    regional queries on zip code prefixes (e.g., "606" or "60614").
+
+    The rows are kept sorted by zip code, so the rows with a given
+    prefix are a contiguous range, found with two binary searches.
+    Running totals of the amounts (for contribution rows) give the
+    count and total for a prefix without looking at its rows.
+    """
+
+    def __init__(self, rows, field="Zipcode", amount_field="Amount"):
+        """
+        Constructor.
+
+        Parameters
+        - rows: iterable of rows (dictionaries or records)
+        - field: (string) the zip code field
+        - amount_field: (string) the field summed by total_with_prefix.
+            Rows without it (e.g., candidates) can still be queried by
+            rows_with_prefix and count_with_prefix.
+        """
+
+        rows = list(rows)
+        # Sorting is stable, so rows with equal zip codes stay in order
+        rows.sort(key=operator.itemgetter(field))
+        self._rows = rows
+        self._zipcodes = [row[field] for row in rows]
+
+        self._amount_prefix = None
+        if rows and amount_field in rows[0]:
+            amounts = (float(row[amount_field]) for row in rows)
+            self._amount_prefix = list(itertools.accumulate(amounts, initial=0.0))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _range(self, prefix):
+        """
+        Find the range of rows whose zip codes start with prefix.
+        """
+
+        if not prefix:
+            return 0, len(self._rows)
+        lb = bisect.bisect_left(self._zipcodes, prefix)
+        # The first string after every string that starts with prefix
+        after = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        ub = bisect.bisect_left(self._zipcodes, after, lb)
+        return lb, ub
+
+    def rows_with_prefix(self, prefix):
+        """
+        Find the rows whose zip codes start with a prefix, in
+        O(log N + number of results) time.
+
+        Inputs:
+            prefix (string): the start of a zip code (e.g., "606")
+
+        Returns: list of rows, ordered by zip code (rows with the same
+            zip code are in their original order)
+        """
+
+        lb, ub = self._range(prefix)
+        return self._rows[lb:ub]
+
+    def count_with_prefix(self, prefix):
+        """
+        Count the rows whose zip codes start with a prefix, in
+        O(log N) time.
+
+        Inputs:
+            prefix (string): the start of a zip code
+
+        Returns: int
+        """
+
+        lb, ub = self._range(prefix)
+        return ub - lb
+
+    def total_with_prefix(self, prefix):
+        """
+        Compute the total amount and number of the rows whose zip codes
+        start with a prefix, in O(log N) time.
+
+        Inputs:
+            prefix (string): the start of a zip code
+
+        Returns: a tuple of the total amount (float) and the number of
+            rows (int)
+        """
+
+        if self._amount_prefix is None:
+            if not self._rows:
+                return (0.0, 0)
+            raise ValueError("The rows have no amount field")
+        lb, ub = self._range(prefix)
+        return (self._amount_prefix[ub] - self._amount_prefix[lb], ub - lb)
+
+    def totals_by_prefix(self, length):
+        """
+        Group the rows by the first length characters of their zip
+        codes, in one pass over the sorted rows.
+
+        Inputs:
+            length (int): the length of the prefixes (e.g., 3)
+
+        Returns: dictionary that maps each prefix to a tuple of the
+            total amount (or None, for rows without amounts) and the
+            number of rows
+        """
+
+        totals = {}
+        lb = 0
+        while lb < len(self._zipcodes):
+            prefix = self._zipcodes[lb][:length]
+            if len(prefix) < length:
+                # Short zip codes form their own groups
+                ub = bisect.bisect_right(self._zipcodes, prefix, lb)
+            else:
+                ub = self._range(prefix)[1]
+            total = None
+            if self._amount_prefix is not None:
+                total = self._amount_prefix[ub] - self._amount_prefix[lb]
+            totals[prefix] = (total, ub - lb)
+            lb = ub
+        return totals
+
+
+class FundRaiserIndex(object):
+    """
+    The candidates from a dictionary of donation counts, sorted by
+    count, for answering find_successful_fund_raisers for many
+    thresholds.
+
+    Candidates are ordered by decreasing number of donations, with
+    ties broken by candidate ID, so results are deterministic.
+    """
+
+    def __init__(self, cand_to_count):
+        """
+        Constructor.
+
+        Parameters
+        - cand_to_count: dictionary that maps Candidate IDs to integers
+        """
+
+        ranked = sorted(cand_to_count.items(), key=rank_key)
+        self._cand_ids = [cand_id for cand_id, _ in ranked]
+        self._neg_counts = [-count for _, count in ranked]
+
+    def __len__(self):
+        return len(self._cand_ids)
+
+    def find_successful_fund_raisers(self, threshold):
+        """
+        Compute a list of the candidates who have received at least
+        the threshold number of contributions, in O(log n + k) time.
+
+        Inputs:
+            threshold (int): the threshold for labeling a candidate as
+                successful
+
+        Returns: list of Candidate IDs
+        """
+
+        k = bisect.bisect_right(self._neg_counts, -threshold)
+        return self._cand_ids[:k]
+
+    def top_k(self, k):
+        """
+        Find the k candidates who received the most contributions.
+
+        Inputs:
+            k (int): the number of candidates
+
+        Returns: list of Candidate IDs
+        """
+
+        return self._cand_ids[:max(k, 0)]
+
+
+def rank_key(item):
+    """
+    Sort key for (Candidate ID, count) pairs: decreasing count, then
+    increasing candidate ID.
+    """
+
+    cand_id, count = item
+    return (-count, cand_id)
+
+
+def top_k_fund_raisers(cand_to_count, k):
+    """
+    Find the k candidates who received the most contributions, without
+    sorting the whole dictionary. Ties are broken by candidate ID.
+
+    Inputs:
+        cand_to_count: dictionary that maps Candidate IDs to integers
+        k (int): the number of candidates
+
+    Returns: list of Candidate IDs, in decreasing order of count
+    """
+
+    top = heapq.nsmallest(k, cand_to_count.items(), key=rank_key)
+    return [cand_id for cand_id, _ in top]
+
+
+def check_indices(indices, values):
+    """
+    Check, in bulk, that every index is valid for the list of values.
+
+    Inputs:
+        indices: a sequence of integers
+        values: a list of values
+
+    Raises IndexError, naming the invalid indices, if any index is out
+        of range.
+    """
+
+    n = len(values)
+    if indices and (min(indices) < -n or max(indices) >= n):
+        bad = [i for i in indices if not -n <= i < n]
+        msg = "Indices out of range for {} values: {}"
+        raise IndexError(msg.format(n, bad))
+
+
+def construct_dict_from_lists_fast(keys, values):
+    """
+    Given a list of (key, index) pair and a list of values, construct a
+    dictionary that maps each key to the value in the list of values at the
+    specified index.
+
+    The indices are checked all at once, the values are gathered with
+    a single itemgetter call (or one fancy index, if values is a NumPy
+    array), and the dictionary is built with one dict(zip(...)).
+
+    Inputs:
+        keys: a list of (key, index) pairs, where each key is a (unique)
+            immutable value (string, int, etc.), and each index is an integer
+        values: a list (or array) of values
+
+    Returns: dictionary
+    """
+
+    if not keys:
+        return {}
+
+    # zip(*keys) would create one iterator per pair, so split the
+    # pairs with itemgetter instead
+    names = list(map(operator.itemgetter(0), keys))
+    indices = list(map(operator.itemgetter(1), keys))
+    check_indices(indices, values)
+
+    if hasattr(values, "dtype"):
+        gathered = values[indices]
+    elif len(indices) == 1:
+        gathered = [values[indices[0]]]
+    else:
+        gathered = operator.itemgetter(*indices)(values)
+
+    return dict(zip(names, gathered))
+
+
+class LazyDictFromLists(Mapping):
+    """
+    A read-only mapping with the same contents as
+    construct_dict_from_lists(keys, values), that looks up each value
+    in the list of values when it is accessed.
+    """
+
+    def __init__(self, keys, values):
+        """
+        Constructor.
+
+        Parameters
+        - keys: a list of (key, index) pairs
+        - values: a list of values (not copied)
+        """
+
+        self._positions = dict(keys)
+        check_indices(list(self._positions.values()), values)
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._positions[key]]
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
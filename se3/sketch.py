@@ -0,0 +1,337 @@
+"""
+Streaming sketches for monitoring contribution feeds that do not fit in
+memory.
+
+- CountMinSketch estimates how many times each key has been seen.
+- HeavyHitters combines a CountMinSketch with a heap to track the k
+  most frequent keys (e.g., the cities with the most contributions).
+- HyperLogLog estimates the number of distinct keys (e.g., the number
+  of distinct donor zip codes).
+
+ContributionSketches feeds a stream of contribution rows (as produced
+by test_helpers.read_CSV_file or records.iter_CSV_records) to these
+sketches in one pass. Every sketch has a merge method, so a file can
+be split (e.g., with donations.line_ranges), sketched in several
+processes, and the results merged.
+"""
+
+import functools
+import hashlib
+import heapq
+import math
+
+
+# Number of distinct (city, state) spellings whose normalized form is
+# remembered, so that memory use stays bounded on long streams
+CITY_KEY_CACHE_SIZE = 10000
+
+
+def hash64(key, salt=b""):
+    '''
+    Hash a string to a 64-bit integer that is the same in every process.
+    '''
+
+    digest = hashlib.blake2b(key.encode(), digest_size=8, salt=salt).digest()
+    return int.from_bytes(digest, "little")
+
+
+@functools.lru_cache(maxsize=CITY_KEY_CACHE_SIZE)
+def city_key(city, state):
+    '''
+    Normalize a location the way se3_bulk.location_key does (case-folded,
+    with spaces collapsed), as a "city, state" string.
+    '''
+
+    return "{}, {}".format(" ".join(city.split()).casefold(), state.strip().casefold())
+
+
+class CountMinSketch(object):
+    """
+    Estimates the number of times each key has been added, using
+    width * depth counters.
+
+    The estimate for a key is never less than its true count. With
+    width = ceil(e / epsilon) and depth = ceil(ln(1 / delta)), the
+    estimate exceeds the true count by more than epsilon * N (where N
+    is the total of all counts) with probability at most delta.
+    """
+
+    def __init__(self, epsilon=0.001, delta=0.01):
+        """
+        Constructor.
+
+        Parameters
+        - epsilon: (float) the error, as a fraction of the total count
+        - delta: (float) the probability that the error is exceeded
+        """
+
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.total = 0
+        self._counts = [[0] * self.width for _ in range(self.depth)]
+
+    def _columns(self, key):
+        # Double hashing: the column in row i is h1 + i * h2
+        h1 = hash64(key)
+        h2 = hash64(key, b"cms") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, count=1):
+        """
+        Add count occurrences of a key.
+
+        Returns: the new estimate for the key
+        """
+
+        self.total += count
+        estimate = None
+        for row, column in zip(self._counts, self._columns(key)):
+            row[column] += count
+            if estimate is None or row[column] < estimate:
+                estimate = row[column]
+        return estimate
+
+    def estimate(self, key):
+        """
+        Estimate the number of times a key has been added.
+        """
+
+        return min(row[column]
+                   for row, column in zip(self._counts, self._columns(key)))
+
+    def merge(self, other):
+        """
+        Add the counts of another sketch with the same dimensions.
+        """
+
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge sketches with different dimensions")
+        self.total += other.total
+        for row, other_row in zip(self._counts, other._counts):
+            for i, count in enumerate(other_row):
+                row[i] += count
+
+
+class HeavyHitters(object):
+    """
+    Tracks the k most frequent keys in a stream, with counts estimated
+    by a CountMinSketch (so they have the same error bounds). Memory
+    use depends on k and the sketch dimensions, not on the stream.
+    """
+
+    def __init__(self, k, epsilon=0.001, delta=0.01):
+        """
+        Constructor.
+
+        Parameters
+        - k: (int) the number of keys to track
+        - epsilon, delta: the error bounds of the CountMinSketch
+        """
+
+        self.k = k
+        self.sketch = CountMinSketch(epsilon, delta)
+        # Maps the tracked keys to their estimates. The heap holds
+        # (estimate, key) pairs, some of them out of date, and is used
+        # to find the tracked key with the smallest estimate.
+        self._top = {}
+        self._heap = []
+
+    def _push(self, key, estimate):
+        self._top[key] = estimate
+        heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self.k + 16:
+            self._heap = [(est, key) for key, est in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def _min(self):
+        # Discard out-of-date heap entries
+        while self._heap and self._top.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def _offer(self, key, estimate):
+        """
+        Track key if its estimate puts it among the top k.
+        """
+
+        if key in self._top or len(self._top) < self.k:
+            self._push(key, estimate)
+            return
+        min_estimate, min_key = self._min()
+        if estimate > min_estimate:
+            heapq.heappop(self._heap)
+            del self._top[min_key]
+            self._push(key, estimate)
+
+    def add(self, key, count=1):
+        """
+        Add count occurrences of a key.
+        """
+
+        if self.k > 0:
+            self._offer(key, self.sketch.add(key, count))
+        else:
+            self.sketch.add(key, count)
+
+    def top(self):
+        """
+        The tracked keys, most frequent first (ties broken by key).
+
+        Returns: list of (key, estimated count) pairs
+        """
+
+        return sorted(self._top.items(), key=lambda item: (-item[1], item[0]))
+
+    def merge(self, other):
+        """
+        Merge another HeavyHitters with the same parameters into this
+        one.
+        """
+
+        self.sketch.merge(other.sketch)
+        candidates = set(self._top) | set(other._top)
+        self._top = {}
+        self._heap = []
+        for key in candidates:
+            self._offer(key, self.sketch.estimate(key))
+
+
+class HyperLogLog(object):
+    """
+    Estimates the number of distinct keys added, using 2^p one-byte
+    registers. The relative standard error of the estimate is about
+    1.04 / sqrt(2^p) (e.g., 3.25% for p = 10, 1.6% for p = 12).
+    """
+
+    def __init__(self, p=10):
+        """
+        Constructor.
+
+        Parameters
+        - p: (int) the number of bits used to pick a register (4 to 16)
+        """
+
+        if not 4 <= p <= 16:
+            raise ValueError("p must be between 4 and 16")
+        self.p = p
+        self._registers = bytearray(2 ** p)
+
+    def add(self, key):
+        """
+        Add a key.
+        """
+
+        h = hash64(key)
+        register = h >> (64 - self.p)
+        rest = (h << self.p) & (2 ** 64 - 1)
+        # Position of the first 1 bit in the remaining 64 - p bits
+        rank = min(64 - rest.bit_length(), 64 - self.p) + 1
+        if rank > self._registers[register]:
+            self._registers[register] = rank
+
+    def estimate(self):
+        """
+        Estimate the number of distinct keys added.
+
+        Returns: float
+        """
+
+        m = len(self._registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # Small range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def __len__(self):
+        return round(self.estimate())
+
+    def merge(self, other):
+        """
+        Merge another HyperLogLog with the same p into this one.
+        """
+
+        if self.p != other.p:
+            raise ValueError("Cannot merge HyperLogLogs with different p")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+
+class ContributionSketches(object):
+    """
+    One-pass sketches of a stream of contributions: the cities with the
+    most contributions, and the approximate number of distinct donor
+    zip codes for each candidate.
+
+    Memory use is about width * depth counters for the cities plus
+    2^p bytes per candidate, however long the stream is.
+    """
+
+    def __init__(self, k=10, epsilon=0.001, delta=0.01, p=10):
+        """
+        Constructor.
+
+        Parameters
+        - k: (int) the number of top cities to track
+        - epsilon, delta: the error bounds for the city counts
+        - p: (int) the HyperLogLog precision for zip codes
+        """
+
+        self.p = p
+        self.cities = HeavyHitters(k, epsilon, delta)
+        self.zipcodes = {}
+
+    def add(self, contribution):
+        """
+        Add one contribution (dictionary or record).
+        """
+
+        self.cities.add(city_key(contribution["City"], contribution["State"]))
+        cand_id = contribution["Cand_ID"]
+        if cand_id not in self.zipcodes:
+            self.zipcodes[cand_id] = HyperLogLog(self.p)
+        self.zipcodes[cand_id].add(contribution["Zipcode"])
+
+    def update(self, contributions):
+        """
+        Add a stream of contributions.
+        """
+
+        for contribution in contributions:
+            self.add(contribution)
+
+    def top_cities(self):
+        """
+        The cities with the most contributions. Cities are normalized
+        with city_key, so "Washington, DC" and "WASHINGTON, DC" are the
+        same city.
+
+        Returns: list of ("city, state", estimated count) pairs
+        """
+
+        return self.cities.top()
+
+    def distinct_zipcodes(self):
+        """
+        The approximate number of distinct donor zip codes for each
+        candidate.
+
+        Returns: dictionary that maps candidate IDs to integers
+        """
+
+        return {cand_id: len(hll) for cand_id, hll in self.zipcodes.items()}
+
+    def merge(self, other):
+        """
+        Merge the sketches of another part of the stream into these.
+        """
+
+        self.cities.merge(other.cities)
+        for cand_id, hll in other.zipcodes.items():
+            if cand_id in self.zipcodes:
+                self.zipcodes[cand_id].merge(hll)
+            else:
+                self.zipcodes[cand_id] = HyperLogLog(self.p)
+                self.zipcodes[cand_id].merge(hll)
@@ -0,0 +1,229 @@
+"""
+An SQLite-backed store for the candidate and contribution data.
+
+Instead of loading the CSV files into lists of dictionaries on every
+run, the files are loaded once into a local SQLite database, with
+indexes on the columns the se3 queries use (Candidate_ID/Cand_ID,
+State, and (City, State)). The queries then run as indexed SQL
+queries and return the same values as the se3 functions.
+"""
+
+import csv
+import sqlite3
+
+
+CANDIDATES = "candidates"
+CONTRIBUTIONS = "contributions"
+
+# Columns of each table, used when a table is loaded from an empty list
+DEFAULT_FIELDS = {
+    CANDIDATES: ["Candidate_ID", "City", "District", "First", "Last",
+                 "Party", "State", "Zipcode"],
+    CONTRIBUTIONS: ["Cand_ID", "Amount", "City", "State", "Zipcode",
+                    "Month", "Year"]}
+
+# Columns (or groups of columns) to index, when a table has them
+INDEXED_COLUMNS = [("Candidate_ID",), ("Cand_ID",), ("State",), ("City", "State")]
+
+# Number of rows passed to each executemany call
+BATCH_SIZE = 10000
+
+
+def quote(name):
+    '''
+    Quote an SQL identifier (e.g., a column name from a CSV header).
+    '''
+
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+class Store(object):
+    """
+    A local SQLite database with a candidates table and a
+    contributions table.
+    """
+
+    def __init__(self, db_filename):
+        """
+        Constructor.
+
+        Opens (or creates) the database.
+
+        Parameters
+        - db_filename: (string) the name of the database file, or
+            ":memory:" for a temporary database
+        """
+
+        # Transactions are started explicitly (see load_rows), since
+        # the sqlite3 module would otherwise commit before DDL
+        # statements such as DROP TABLE
+        self.conn = sqlite3.connect(db_filename, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load_csv(self, table, filename):
+        """
+        Replace the contents of a table with the rows of a CSV file.
+
+        Parameters
+        - table: (string) CANDIDATES or CONTRIBUTIONS
+        - filename: (string) the name of the CSV file
+        """
+
+        with open(filename) as f:
+            reader = csv.reader(f)
+            fields = next(reader)
+            self.load_rows(table, fields, (row for row in reader if row))
+
+    def load_dicts(self, table, rows):
+        """
+        Replace the contents of a table with a list of dictionaries
+        (e.g., as returned by test_helpers.read_CSV_file).
+
+        Parameters
+        - table: (string) CANDIDATES or CONTRIBUTIONS
+        - rows: list of dictionaries with the same keys
+        """
+
+        fields = list(rows[0].keys()) if rows else DEFAULT_FIELDS[table]
+        self.load_rows(table, fields,
+                       ([row[field] for field in fields] for row in rows))
+
+    def load_rows(self, table, fields, rows):
+        """
+        Replace the contents of a table, in a single transaction, and
+        index it. If the load fails (e.g., rows raises an exception),
+        the table keeps its previous contents.
+
+        Parameters
+        - table: (string) CANDIDATES or CONTRIBUTIONS
+        - fields: list of column names
+        - rows: iterable of lists of values, one per column
+        """
+
+        columns = ", ".join(quote(field) for field in fields)
+        insert = "INSERT INTO {} VALUES ({})".format(
+            quote(table), ", ".join("?" for _ in fields))
+
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.execute("DROP TABLE IF EXISTS {}".format(quote(table)))
+            self.conn.execute("CREATE TABLE {} ({})".format(quote(table), columns))
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    self.conn.executemany(insert, batch)
+                    batch = []
+            self.conn.executemany(insert, batch)
+
+            # Building the indexes after loading is faster than
+            # updating them on every insert
+            for index_columns in INDEXED_COLUMNS:
+                if all(column in fields for column in index_columns):
+                    name = "{}_{}".format(table, "_".join(index_columns))
+                    self.conn.execute("CREATE INDEX {} ON {} ({})".format(
+                        quote(name), quote(table),
+                        ", ".join(quote(column) for column in index_columns)))
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def find_candidates_from_city(self, office_loc):
+        """
+        Construct a list of the candidate IDs for candidates with a
+        campaign headquartered in the specified location.
+
+        Inputs:
+            office_loc (string, string): a tuple of the form
+                (city name, state abbreviation)
+
+        Returns: list of candidate IDs (strings)
+        """
+
+        cursor = self.conn.execute(
+            "SELECT Candidate_ID FROM candidates WHERE City = ? AND State = ?"
+            " ORDER BY rowid", tuple(office_loc))
+        return [row[0] for row in cursor]
+
+    def construct_homestate_dict(self):
+        """
+        Construct a dictionary that maps a candidate ID to the
+        candidate's home state. If several candidates share an ID, the
+        last one wins.
+
+        Returns: dictionary that maps candidate id (string) to a state
+            abbreviation (string)
+        """
+
+        cursor = self.conn.execute(
+            "SELECT Candidate_ID, State FROM candidates ORDER BY rowid")
+        return {cand_id: state for cand_id, state in cursor}
+
+    def construct_cands_by_state(self):
+        """
+        Construct a mapping from states to the candidates from that
+        state.
+
+        Returns: dictionary that maps a state abbreviation (string) to
+            a list of dictionaries for candidates from that state.
+        """
+
+        cands_by_state = {}
+        cursor = self.conn.execute(
+            "SELECT * FROM candidates ORDER BY State, rowid")
+        for row in cursor:
+            cands_by_state.setdefault(row["State"], []).append(dict(row))
+        return cands_by_state
+
+    def cands_from_state(self, state):
+        """
+        Find the candidates from a state.
+
+        Inputs:
+            state (string): the state abbreviation
+
+        Returns: list of dictionaries
+        """
+
+        cursor = self.conn.execute(
+            "SELECT * FROM candidates WHERE State = ? ORDER BY rowid", (state,))
+        return [dict(row) for row in cursor]
+
+    def donor_count(self):
+        """
+        Construct a dictionary that maps each candidate ID to the
+        number of contributions for that candidate.
+
+        Returns: dictionary that maps candidate IDs (strings) to integers
+        """
+
+        cursor = self.conn.execute(
+            "SELECT Cand_ID, COUNT(*) FROM contributions GROUP BY Cand_ID")
+        return {cand_id: count for cand_id, count in cursor}
+
+    def find_successful_fund_raisers(self, threshold):
+        """
+        Compute a list of the candidates who have received at least
+        the threshold number of contributions.
+
+        Inputs:
+            threshold (int): the threshold for labeling a candidate as
+                successful
+
+        Returns: list of Candidate IDs
+        """
+
+        cursor = self.conn.execute(
+            "SELECT Cand_ID FROM contributions GROUP BY Cand_ID"
+            " HAVING COUNT(*) >= ?", (threshold,))
+        return [row[0] for row in cursor]
@@ -1,12 +1,21 @@
 import csv
+import hashlib
 import json
 import os
+import pickle
 import sys
 
+# Parsed CSV files are cached next to the file, in a file with this suffix
+CACHE_SUFFIX = ".cache.pickle"
+
 def read_CSV_file(filename):
     '''
     Load the data from a CSV file.
 
+    The parsed data is cached in a file next to the CSV file, and
+    later calls load the cache instead of parsing the file again. The
+    cache is rebuilt when the CSV file changes.
+
     Inputs:
       filename (string): the name of the file
 
@@ -14,12 +23,80 @@ def read_CSV_file(filename):
     '''
 
     try:
-        with open(filename) as f:
-            return [row for row in csv.DictReader(f)]
+        key = cache_key(filename)
     except FileNotFoundError:
         msg = ("Cannot open file: {}.")
         assert False, msg.format(filename)
 
+    rows = read_cache(filename + CACHE_SUFFIX, key)
+    if rows is None:
+        with open(filename) as f:
+            rows = [row for row in csv.DictReader(f)]
+        write_cache(filename + CACHE_SUFFIX, key, rows)
+    return rows
+
+
+def cache_key(filename):
+    '''
+    Compute the key that identifies the contents of a file: its path,
+    size, modification time, and a hash of its contents.
+
+    Inputs:
+      filename (string): the name of the file
+
+    Returns: tuple
+    '''
+
+    st = os.stat(filename)
+    digest = hashlib.sha1()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return (os.path.abspath(filename), st.st_size, st.st_mtime_ns,
+            digest.hexdigest())
+
+
+def read_cache(cache_filename, key):
+    '''
+    Load cached data, if the cache was written with the given key.
+
+    Inputs:
+      cache_filename (string): the name of the cache file
+      key (tuple): the key of the file that was cached
+
+    Returns: the cached data, or None if there is no valid cache
+    '''
+
+    try:
+        with open(cache_filename, "rb") as f:
+            if pickle.load(f) != key:
+                return None
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def write_cache(cache_filename, key, data):
+    '''
+    Save data in a cache file, if possible.
+
+    Inputs:
+      cache_filename (string): the name of the cache file
+      key (tuple): the key of the file that is cached
+      data: the data to cache
+    '''
+
+    tmp_filename = "{}.{}.tmp".format(cache_filename, os.getpid())
+    try:
+        with open(tmp_filename, "wb") as f:
+            pickle.dump(key, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, cache_filename)
+    except OSError:
+        # The cache is an optimization: carry on without it
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
 
 def read_JSON_file(filename):
     '''